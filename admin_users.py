@@ -1,17 +1,24 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Query
-from typing import List
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Response
+from typing import List, Optional
 from datetime import datetime
 from ..server import (
-    db, User, UserResponse, UserRole, get_current_user, require_role
+    db, User, UserResponse, UserRole, BulkUserStatusUpdate, get_current_user, require_role,
+    invalidate_cached_user
 )
+from ..pagination import paginate, set_next_cursor
+from ..serialization import shape_many, fast_response
+from ..counters import bump_counters
+from ..bulk import resolve_targets, confirm_updated, bulk_stamp, outcome, bulk_report
 
 router = APIRouter(prefix="/api/admin", tags=["Admin - User Management"])
 
 @router.get("/users", response_model=List[UserResponse])
 async def get_all_users(
+    response: Response,
     current_user: dict = Depends(require_role(UserRole.MANAGER)),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
     role_filter: UserRole = None,
     is_active: bool = None
 ):
@@ -21,8 +28,9 @@ async def get_all_users(
     if is_active is not None:
         filter_dict["is_active"] = is_active
     
-    users = await db.users.find(filter_dict, {"password": 0}).skip(skip).limit(limit).to_list(limit)
-    return [UserResponse(**user) for user in users]
+    users, next_cursor = await paginate(db.users, filter_dict, limit, skip, cursor, {"password": 0})
+    set_next_cursor(response, next_cursor)
+    return fast_response(shape_many(UserResponse, users), response)
 
 @router.get("/users/{user_id}", response_model=UserResponse)
 async def get_user_details(
@@ -75,9 +83,67 @@ async def update_user_role(
         {"id": user_id},
         {"$set": {"role": new_role, "updated_at": datetime.utcnow()}}
     )
+    invalidate_cached_user(user_id)
     
     return {"message": f"User role updated to {new_role}"}
 
+@router.post("/users/bulk/status")
+async def bulk_update_user_status(
+    bulk_data: BulkUserStatusUpdate,
+    current_user: dict = Depends(require_role(UserRole.MANAGER))
+):
+    filter_dict = None
+    if bulk_data.filters is not None:
+        filter_dict = {}
+        try:
+            if bulk_data.filters.get("role_filter"):
+                filter_dict["role"] = UserRole(bulk_data.filters["role_filter"]).value
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid filters"
+            )
+        if bulk_data.filters.get("is_active") is not None:
+            filter_dict["is_active"] = bool(bulk_data.filters["is_active"])
+    
+    users, missing, has_more = await resolve_targets(db.users, bulk_data.ids, filter_dict, {"role": 1, "is_active": 1})
+    results = [outcome(user_id, "not_found") for user_id in missing]
+    
+    # Same rules as the single-user endpoint, applied per item
+    planned = []
+    for user in users:
+        if user["id"] == current_user["id"]:
+            results.append(outcome(user["id"], "forbidden", "Cannot deactivate your own account"))
+        elif user["role"] == UserRole.OWNER and current_user["role"] != UserRole.OWNER:
+            results.append(outcome(user["id"], "forbidden", "Only owners can deactivate other owners"))
+        elif user.get("is_active", True) == bulk_data.is_active:
+            results.append(outcome(user["id"], "unchanged"))
+        else:
+            planned.append(user["id"])
+    
+    if planned:
+        stamp = bulk_stamp()
+        result = await db.users.update_many(
+            {"id": {"$in": planned}, "is_active": {"$ne": bulk_data.is_active}},
+            {"$set": {"is_active": bulk_data.is_active, "updated_at": stamp}}
+        )
+        if result.modified_count == len(planned):
+            updated_ids = set(planned)
+        else:
+            updated_ids = await confirm_updated(db.users, planned, {"is_active": bulk_data.is_active, "updated_at": stamp})
+        
+        for user_id in planned:
+            invalidate_cached_user(user_id)
+            if user_id in updated_ids:
+                results.append(outcome(user_id, "updated"))
+            else:
+                results.append(outcome(user_id, "conflict", "Changed by someone else"))
+        
+        delta = len(updated_ids) if bulk_data.is_active else -len(updated_ids)
+        await bump_counters(db, {"users.active": delta})
+    
+    return bulk_report(results, has_more)
+
 @router.put("/users/{user_id}/status")
 async def update_user_status(
     user_id: str,
@@ -105,12 +171,17 @@ async def update_user_status(
             detail="Only owners can deactivate other owners"
         )
     
-    is_active = status_data.get("is_active", True)
+    is_active = bool(status_data.get("is_active", True))
     
-    await db.users.update_one(
-        {"id": user_id},
+    # Only match a user still in the opposite state (a missing flag means active),
+    # so concurrent toggles move the counter once
+    result = await db.users.update_one(
+        {"id": user_id, "is_active": False if is_active else {"$ne": False}},
         {"$set": {"is_active": is_active, "updated_at": datetime.utcnow()}}
     )
+    invalidate_cached_user(user_id)
+    if result.modified_count:
+        await bump_counters(db, {"users.active": 1 if is_active else -1})
     
     action = "activated" if is_active else "deactivated"
     return {"message": f"User {action} successfully"}
@@ -120,13 +191,6 @@ async def delete_user(
     user_id: str,
     current_user: dict = Depends(require_role(UserRole.OWNER))
 ):
-    user = await db.users.find_one({"id": user_id})
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    
     # Prevent deleting own account
     if user_id == current_user["id"]:
         raise HTTPException(
@@ -134,5 +198,14 @@ async def delete_user(
             detail="Cannot delete your own account"
         )
     
-    await db.users.delete_one({"id": user_id})
+    user = await db.users.find_one_and_delete({"id": user_id})
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    invalidate_cached_user(user_id)
+    if user.get("is_active", True):
+        await bump_counters(db, {"users.active": -1})
     return {"message": "User deleted successfully"}
\ No newline at end of file
@@ -0,0 +1,221 @@
+import json
+import math
+import time
+from threading import Lock
+from typing import Dict, Optional, Tuple
+
+from cache import TTLCache
+
+# Routes keyed by email buffer their body to read it; anything larger is refused with 413
+MAX_BUFFERED_BODY_BYTES = 16 * 1024
+
+class RateLimit:
+    """Token bucket: `rate` requests per second on average, up to `burst` back to back."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+
+class RoutePolicy:
+    """Admission limits for one route.
+
+    max_concurrency - requests in flight at once on this worker; beyond it
+                      the request is shed with 503
+    per_ip          - RateLimit per client IP
+    per_email       - RateLimit per "email" field of the JSON body
+    A request needs a token from every bucket that applies to it; an empty
+    bucket answers 429.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        per_ip: Optional[RateLimit] = None,
+        per_email: Optional[RateLimit] = None
+    ):
+        self.max_concurrency = max_concurrency
+        self.limits = {name: limit for name, limit in (("ip", per_ip), ("email", per_email)) if limit}
+
+class AdmissionController:
+    """Shared state behind AdmissionControlMiddleware, readable for metrics."""
+
+    def __init__(
+        self,
+        policies: Dict[Tuple[str, str], RoutePolicy],
+        max_tracked_clients: int = 100000,
+        trust_forwarded_for: bool = False
+    ):
+        self.policies = {(method.upper(), path): policy for (method, path), policy in policies.items()}
+        self.trust_forwarded_for = trust_forwarded_for
+        self._buckets = TTLCache(maxsize=max_tracked_clients, ttl=3600)
+        self._lock = Lock()
+        self._in_flight: Dict[Tuple[str, str], int] = {}
+        self._counters: Dict[Tuple[str, str], Dict[str, int]] = {
+            route: {"admitted": 0, "shed_concurrency": 0, "shed_rate": 0, "body_too_large": 0} for route in self.policies
+        }
+
+    def policy_for(self, method: str, path: str) -> Optional[RoutePolicy]:
+        return self.policies.get((method, path.rstrip("/") or "/"))
+
+    def take_token(self, route: Tuple[str, str], policy: RoutePolicy, client_keys: Dict[str, str]) -> float:
+        """Take one token from every bucket of the client. Returns 0, or seconds until a retry can succeed."""
+        now = time.monotonic()
+        with self._lock:
+            buckets = []
+            for name, limit in policy.limits.items():
+                value = client_keys.get(name)
+                if not value:
+                    continue
+                key = (route, name, value)
+                tokens, updated = self._buckets.get(key) or (float(limit.burst), now)
+                tokens = min(float(limit.burst), tokens + (now - updated) * limit.rate)
+                buckets.append((key, limit, tokens))
+
+            short = [(limit, tokens) for _, limit, tokens in buckets if tokens < 1.0]
+            taken = 0.0 if short else 1.0
+            for key, limit, tokens in buckets:
+                # A bucket left alone until it is full again can be forgotten
+                self._buckets.set(key, (tokens - taken, now), ttl=limit.burst / limit.rate)
+            if short:
+                return max((1.0 - tokens) / limit.rate for limit, tokens in short)
+            return 0.0
+
+    def enter(self, route: Tuple[str, str], policy: RoutePolicy) -> bool:
+        with self._lock:
+            in_flight = self._in_flight.get(route, 0)
+            if policy.max_concurrency is not None and in_flight >= policy.max_concurrency:
+                return False
+            self._in_flight[route] = in_flight + 1
+            return True
+
+    def leave(self, route: Tuple[str, str]) -> None:
+        with self._lock:
+            self._in_flight[route] -= 1
+
+    def count(self, route: Tuple[str, str], outcome: str) -> None:
+        with self._lock:
+            self._counters[route][outcome] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "routes": {
+                    f"{method} {path}": {**counters, "in_flight": self._in_flight.get((method, path), 0)}
+                    for (method, path), counters in self._counters.items()
+                },
+                "tracked_clients": self._buckets.stats()["size"]
+            }
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+def _email_from_body(body: bytes) -> Optional[str]:
+    if not body or len(body) > MAX_BUFFERED_BODY_BYTES:
+        return None
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return None
+    email = payload.get("email") if isinstance(payload, dict) else None
+    return email.strip().lower() if isinstance(email, str) and email.strip() else None
+
+async def _reject(send, status_code: int, detail: str, retry_after: Optional[float] = None) -> None:
+    body = json.dumps({"detail": detail}).encode("utf-8")
+    headers = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode("ascii")),
+    ]
+    if retry_after is not None:
+        headers.append((b"retry-after", str(max(1, math.ceil(retry_after))).encode("ascii")))
+    await send({"type": "http.response.start", "status": status_code, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+class BodyTooLarge(Exception):
+    pass
+
+async def _read_body(scope, receive, limit: int) -> bytes:
+    declared = _header(scope, b"content-length")
+    if declared and declared.isdigit() and int(declared) > limit:
+        raise BodyTooLarge()
+    chunks, size = [], 0
+    while True:
+        message = await receive()
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > limit:
+            raise BodyTooLarge()
+        chunks.append(chunk)
+        if not message.get("more_body", False):
+            return b"".join(chunks)
+
+def client_ip(scope, trust_forwarded_for: bool = False) -> Optional[str]:
+    if trust_forwarded_for:
+        forwarded = _header(scope, b"x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else None
+
+class AdmissionControlMiddleware:
+    """Sheds load on the routes the controller has policies for; other routes pass straight through.
+
+    Written as plain ASGI rather than BaseHTTPMiddleware so that admitted
+    requests stream through untouched; only routes keyed by email have their
+    body read and replayed to the app. That happens after the per-IP bucket
+    and the concurrency slot were granted, and is capped at
+    MAX_BUFFERED_BODY_BYTES, so a shed route never buffers anything.
+    """
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        policy = self.controller.policy_for(scope["method"], scope["path"])
+        if policy is None:
+            return await self.app(scope, receive, send)
+
+        route = (scope["method"], scope["path"].rstrip("/") or "/")
+        # Cheap checks first: nothing is read from a client that is over its rate or on a shed route
+        retry_after = self.controller.take_token(
+            route, policy, {"ip": client_ip(scope, self.controller.trust_forwarded_for)}
+        )
+        if retry_after:
+            self.controller.count(route, "shed_rate")
+            return await _reject(send, 429, "Too many requests, slow down", retry_after)
+
+        if not self.controller.enter(route, policy):
+            self.controller.count(route, "shed_concurrency")
+            return await _reject(send, 503, "Server busy, retry shortly", 1)
+
+        try:
+            if "email" in policy.limits:
+                try:
+                    body = await _read_body(scope, receive, MAX_BUFFERED_BODY_BYTES)
+                except BodyTooLarge:
+                    self.controller.count(route, "body_too_large")
+                    return await _reject(send, 413, "Request body too large")
+
+                retry_after = self.controller.take_token(route, policy, {"email": _email_from_body(body)})
+                if retry_after:
+                    self.controller.count(route, "shed_rate")
+                    return await _reject(send, 429, "Too many requests, slow down", retry_after)
+
+                original_receive, replayed = receive, False
+
+                async def receive():
+                    nonlocal replayed
+                    if not replayed:
+                        replayed = True
+                        return {"type": "http.request", "body": body, "more_body": False}
+                    return await original_receive()
+
+            self.controller.count(route, "admitted")
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.leave(route)
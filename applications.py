@@ -1,13 +1,72 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Response
 from typing import List, Optional
 from datetime import datetime
+from collections import Counter
+from pymongo import UpdateOne
+import asyncio
 from ..server import (
-    db, Application, ApplicationCreate, ApplicationStatus, ApplicationType,
-    get_current_user, require_role, UserRole
+    db, client, Application, ApplicationCreate, ApplicationStatus, ApplicationType,
+    BulkApplicationStatusUpdate, get_current_user, require_role, UserRole,
+    record_counter_change, live_hub, MAIL_ENABLED
 )
+from ..pagination import paginate, set_next_cursor
+from ..serialization import shape_many, strip_ids, fast_response
+from ..lookup import lookup_filter, lookup_page
+from ..counters import application_added, moved
+from ..broadcast import REGISTRATIONS_TOPIC
+from ..rollups import record_rollup, application_created, status_transition
+from ..registration import (
+    register_application, reserve_seat, release_seat, free_seat, holds_seat,
+    leave_waitlist, target_id_of, waitlist_position, seat_key
+)
+from ..bulk import (
+    resolve_targets, confirm_updated, merge_changes, bulk_stamp, outcome, bulk_report
+)
+from ..outbox import outbox_message, write_with_outbox
 
 router = APIRouter(prefix="/api", tags=["Applications"])
 
+async def _fetch_by_ids(collection, ids: set, projection: dict) -> dict:
+    if not ids:
+        return {}
+    docs = await collection.find(
+        {"id": {"$in": list(ids)}},
+        {"_id": 0, "id": 1, **projection}
+    ).to_list(len(ids))
+    return {doc["id"]: doc for doc in docs}
+
+async def enrich_applications(applications: List[dict]) -> List[dict]:
+    # One $in query per collection instead of three lookups per application
+    user_ids = {app["user_id"] for app in applications if app.get("user_id")}
+    program_ids = {app["program_id"] for app in applications if app.get("program_id")}
+    event_ids = {app["event_id"] for app in applications if app.get("event_id")}
+    
+    users, programs, events = await asyncio.gather(
+        _fetch_by_ids(db.users, user_ids, {"name": 1, "email": 1}),
+        _fetch_by_ids(db.programs, program_ids, {"title": 1}),
+        _fetch_by_ids(db.events, event_ids, {"title": 1})
+    )
+    
+    for app in applications:
+        user = users.get(app["user_id"])
+        app["user"] = {"name": user["name"], "email": user["email"]} if user else None
+        
+        if app.get("program_id"):
+            program = programs.get(app["program_id"])
+            app["program"] = {"title": program["title"]} if program else None
+        
+        if app.get("event_id"):
+            event = events.get(app["event_id"])
+            app["event"] = {"title": event["title"]} if event else None
+    
+    return applications
+
+def publish_seat_changes(applications) -> None:
+    # Live registration counters; the hub reads the new numbers once per burst
+    live_hub.publish(REGISTRATIONS_TOPIC, {
+        seat_key(application["type"], target_id_of(application)): 1 for application in applications
+    })
+
 # User endpoint - submit application
 @router.post("/applications", response_model=Application)
 async def submit_application(
@@ -27,44 +86,25 @@ async def submit_application(
             detail="event_id is required for event applications"
         )
     
-    # Check if user has already applied
-    existing_app = None
-    if app_data.program_id:
-        existing_app = await db.applications.find_one({
-            "user_id": current_user["id"],
-            "program_id": app_data.program_id
-        })
-    elif app_data.event_id:
-        existing_app = await db.applications.find_one({
-            "user_id": current_user["id"],
-            "event_id": app_data.event_id
-        })
-    
-    if existing_app:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="You have already applied for this program/event"
-        )
+    # Only the id matching the type is kept, so the other side of the
+    # unique (user_id, program_id/event_id) indexes stays null
+    application_dict = app_data.dict()
+    if app_data.type == ApplicationType.EVENT:
+        application_dict["program_id"] = None
+    else:
+        application_dict["event_id"] = None
     
-    # Create application
     application = Application(
         user_id=current_user["id"],
-        **app_data.dict()
+        **application_dict
     )
     
-    await db.applications.insert_one(application.dict())
-    
-    # Update participant count if it's an event
-    if app_data.event_id:
-        await db.events.update_one(
-            {"id": app_data.event_id},
-            {"$inc": {"current_registrations": 1}}
-        )
-    elif app_data.program_id:
-        await db.programs.update_one(
-            {"id": app_data.program_id},
-            {"$inc": {"current_participants": 1}}
-        )
+    # Seat reservation, insert and duplicate detection in one engine;
+    # raises 404 for unknown targets, 409 when full, 400 on duplicates
+    await register_application(db, application)
+    publish_seat_changes([application.dict()])
+    await record_counter_change(application_added(application.status))
+    await record_rollup(db, application_created(application.type, application.status))
     
     return application
 
@@ -74,71 +114,209 @@ async def get_my_applications(
     current_user: dict = Depends(get_current_user)
 ):
     applications = await db.applications.find({"user_id": current_user["id"]}).to_list(1000)
-    return [Application(**app) for app in applications]
+    return fast_response(shape_many(Application, applications))
+
+# User endpoint - waitlist position, answered from the waitlist collection only
+@router.get("/applications/{application_id}/waitlist")
+async def get_waitlist_position(
+    application_id: str,
+    current_user: dict = Depends(get_current_user)
+):
+    position = await waitlist_position(db, application_id, current_user["id"])
+    if not position:
+        return {"application_id": application_id, "waitlisted": False}
+    return {**position, "waitlisted": True}
 
 # Admin endpoints
 @router.get("/admin/applications", response_model=List[dict])
 async def get_all_applications(
+    response: Response,
     current_user: dict = Depends(require_role(UserRole.EDITOR)),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
     status_filter: Optional[ApplicationStatus] = None,
-    type_filter: Optional[ApplicationType] = None
+    type_filter: Optional[ApplicationType] = None,
+    q: Optional[str] = None
 ):
     filter_dict = {}
     if status_filter:
         filter_dict["status"] = status_filter
     if type_filter:
         filter_dict["type"] = type_filter
-    
-    applications = await db.applications.find(filter_dict).skip(skip).limit(limit).to_list(limit)
+    projection = {"_id": 0, "search_keys": 0}
+    if q:
+        # Prefix of the applicant's name, email or phone; paged in index order
+        filter_dict.update(lookup_filter(q))
+        applications = await lookup_page(db.applications, filter_dict, limit, skip, cursor, projection)
+    else:
+        applications, next_cursor = await paginate(db.applications, filter_dict, limit, skip, cursor, projection)
+        set_next_cursor(response, next_cursor)
     
     # Enrich with user, program, and event data
-    enriched_applications = []
-    for app in applications:
-        # Get user data
-        user = await db.users.find_one({"id": app["user_id"]})
-        app["user"] = {"name": user["name"], "email": user["email"]} if user else None
-        
-        # Get program/event data
-        if app.get("program_id"):
-            program = await db.programs.find_one({"id": app["program_id"]})
-            app["program"] = {"title": program["title"]} if program else None
-        
-        if app.get("event_id"):
-            event = await db.events.find_one({"id": app["event_id"]})
-            app["event"] = {"title": event["title"]} if event else None
-        
-        enriched_applications.append(app)
-    
-    return enriched_applications
+    return fast_response(strip_ids(await enrich_applications(applications)), response)
 
 @router.get("/admin/applications/{application_id}", response_model=dict)
 async def get_application_details(
     application_id: str,
     current_user: dict = Depends(require_role(UserRole.EDITOR))
 ):
-    application = await db.applications.find_one({"id": application_id})
+    application = await db.applications.find_one({"id": application_id}, {"_id": 0, "search_keys": 0})
     if not application:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Application not found"
         )
     
-    # Enrich with user data
-    user = await db.users.find_one({"id": application["user_id"]})
-    application["user"] = user
+    # Enrich with user, program, and event data
+    enriched = await enrich_applications([application])
+    return enriched[0]
+
+def status_change_error(old_status: str, new_status: str) -> Optional[str]:
+    # The waitlist owns WAITLISTED: it can only be entered on submit and left
+    # by promotion or rejection
+    if new_status == ApplicationStatus.WAITLISTED and old_status != ApplicationStatus.WAITLISTED:
+        return "Applications cannot be moved onto the waitlist manually"
+    if old_status == ApplicationStatus.WAITLISTED and new_status not in (ApplicationStatus.WAITLISTED, ApplicationStatus.REJECTED):
+        return "Waitlisted applications are promoted automatically when a seat frees up"
+    return None
+
+async def status_change_messages(applications: List[dict], new_status: str, review_notes: Optional[str]) -> List[dict]:
+    # Enriched once for the whole batch; applicants without an email get no message
+    recipients = [dict(app) for app in applications if (app.get("form_data") or {}).get("email")]
+    messages = []
+    for app in await enrich_applications(recipients):
+        target = app.get("program") or app.get("event") or {}
+        title = target.get("title") or f"this {app['type'].lower()}"
+        body = f"Hello {app['form_data'].get('name', '')},\n\nYour application for {title} is now {new_status}."
+        if review_notes:
+            body += f"\n\nNotes from the reviewer:\n{review_notes}"
+        messages.append(outbox_message(
+            "application_status",
+            to=app["form_data"]["email"],
+            subject=f"Application update: {title}",
+            body=body,
+            ref=app["id"]
+        ))
+    return messages
+
+def application_filter(filters: dict) -> dict:
+    filter_dict = {}
+    if filters.get("status_filter"):
+        filter_dict["status"] = ApplicationStatus(filters["status_filter"]).value
+    if filters.get("type_filter"):
+        filter_dict["type"] = ApplicationType(filters["type_filter"]).value
+    return filter_dict
+
+@router.post("/admin/applications/bulk/status")
+async def bulk_update_application_status(
+    bulk_data: BulkApplicationStatusUpdate,
+    current_user: dict = Depends(require_role(UserRole.EDITOR))
+):
+    try:
+        filter_dict = application_filter(bulk_data.filters) if bulk_data.filters is not None else None
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid filters"
+        )
+    
+    applications, missing, has_more = await resolve_targets(
+        db.applications, bulk_data.ids, filter_dict,
+        {"status": 1, "type": 1, "program_id": 1, "event_id": 1, "user_id": 1, "form_data": 1}
+    )
+    results = [outcome(application_id, "not_found") for application_id in missing]
+    
+    new_status = bulk_data.status.value
+    stamp = bulk_stamp()
+    update_data = {
+        "status": new_status,
+        "review_notes": bulk_data.review_notes,
+        "reviewed_by": current_user["id"],
+        "reviewed_at": stamp,
+        "updated_at": stamp
+    }
+    
+    operations = []
+    planned = {}
+    for application in applications:
+        old_status = application["status"]
+        error = status_change_error(old_status, new_status)
+        if error:
+            results.append(outcome(application["id"], "invalid", error))
+            continue
+        if not holds_seat(old_status) and holds_seat(new_status):
+            try:
+                await reserve_seat(db, application["type"], target_id_of(application))
+            except HTTPException as e:
+                results.append(outcome(application["id"], "no_seat", e.detail))
+                continue
+        # Same guard as the single update: only if nobody changed it meanwhile
+        operations.append(UpdateOne({"id": application["id"], "status": old_status}, {"$set": update_data}))
+        planned[application["id"]] = application
     
-    # Get program/event data
-    if application.get("program_id"):
-        program = await db.programs.find_one({"id": application["program_id"]})
-        application["program"] = program
+    messages = []
+    if MAIL_ENABLED:
+        messages = await status_change_messages(
+            [application for application in planned.values() if application["status"] != new_status],
+            new_status, bulk_data.review_notes
+        )
     
-    if application.get("event_id"):
-        event = await db.events.find_one({"id": application["event_id"]})
-        application["event"] = event
+    updated_ids = set()
     
-    return application
+    async def write_statuses(session):
+        nonlocal updated_ids
+        result = await db.applications.bulk_write(operations, ordered=False, session=session)
+        if result.matched_count == len(operations):
+            updated_ids = set(planned)
+        else:
+            updated_ids = await confirm_updated(
+                db.applications, planned, {"reviewed_at": stamp, "reviewed_by": current_user["id"]},
+                session=session
+            )
+        return bool(updated_ids)
+    
+    if operations:
+        # Applicant emails are queued with the writes, only for the rows that changed
+        await write_with_outbox(
+            client, db, write_statuses,
+            lambda: [message for message in messages if message["ref"] in updated_ids]
+        )
+    
+    freed = Counter()
+    for application_id, application in planned.items():
+        old_status = application["status"]
+        took_seat = not holds_seat(old_status) and holds_seat(new_status)
+        if application_id not in updated_ids:
+            if took_seat:
+                await release_seat(db, application["type"], target_id_of(application))
+            results.append(outcome(application_id, "conflict", "Changed by someone else"))
+            continue
+        if holds_seat(old_status) and not holds_seat(new_status):
+            freed[(application["type"], target_id_of(application))] += 1
+        elif old_status == ApplicationStatus.WAITLISTED and new_status == ApplicationStatus.REJECTED:
+            await leave_waitlist(db, application)
+        results.append(outcome(application_id, "updated"))
+    
+    # Seats are released per event/program in one step, then the queue is promoted once
+    for (app_type, target_id), count in freed.items():
+        field = "event_id" if app_type == ApplicationType.EVENT else "program_id"
+        await free_seat(db, {"type": app_type, field: target_id}, count)
+    
+    updated = [planned[application_id] for application_id in updated_ids]
+    publish_seat_changes(
+        application for application in updated
+        if holds_seat(application["status"]) != holds_seat(new_status)
+        or application["status"] == ApplicationStatus.WAITLISTED
+    )
+    await record_counter_change(merge_changes(
+        moved("applications.status", application["status"], new_status) for application in updated
+    ))
+    await record_rollup(db, merge_changes(
+        status_transition("applications", application["status"], new_status) for application in updated
+    ))
+    
+    return bulk_report(results, has_more)
 
 @router.put("/admin/applications/{application_id}/status")
 async def update_application_status(
@@ -162,6 +340,19 @@ async def update_application_status(
             detail="Invalid status"
         )
     
+    old_status = application["status"]
+    error = status_change_error(old_status, new_status)
+    if error:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=error
+        )
+    
+    # Un-rejecting needs a seat back before the status changes
+    takes_seat = not holds_seat(old_status) and holds_seat(new_status)
+    if takes_seat:
+        await reserve_seat(db, application["type"], target_id_of(application))
+    
     update_data = {
         "status": new_status,
         "review_notes": review_notes,
@@ -170,10 +361,36 @@ async def update_application_status(
         "updated_at": datetime.utcnow()
     }
     
-    await db.applications.update_one(
-        {"id": application_id},
-        {"$set": update_data}
-    )
+    # The applicant's notification is queued in the same transaction as the change
+    messages = []
+    if MAIL_ENABLED and new_status != old_status:
+        messages = await status_change_messages([application], new_status, review_notes)
+    
+    # Conditional on the status we read, so two reviewers can't both free the same seat
+    async def write_status(session):
+        result = await db.applications.update_one(
+            {"id": application_id, "status": old_status},
+            {"$set": update_data},
+            session=session
+        )
+        return result.modified_count > 0
+    
+    if not await write_with_outbox(client, db, write_status, messages):
+        if takes_seat:
+            await release_seat(db, application["type"], target_id_of(application))
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Application was changed by someone else, reload and retry"
+        )
+    
+    if holds_seat(old_status) and not holds_seat(new_status):
+        await free_seat(db, application)
+    elif old_status == ApplicationStatus.WAITLISTED and new_status == ApplicationStatus.REJECTED:
+        await leave_waitlist(db, application)
+    if holds_seat(old_status) != holds_seat(new_status) or old_status == ApplicationStatus.WAITLISTED:
+        publish_seat_changes([application])
+    await record_counter_change(moved("applications.status", application["status"], new_status))
+    await record_rollup(db, status_transition("applications", application["status"], new_status))
     
     return {"message": "Application status updated successfully"}
 
@@ -182,12 +399,18 @@ async def delete_application(
     application_id: str,
     current_user: dict = Depends(require_role(UserRole.MANAGER))
 ):
-    application = await db.applications.find_one({"id": application_id})
+    # Seats and counters follow the document actually removed, so racing deletes count once
+    application = await db.applications.find_one_and_delete({"id": application_id})
     if not application:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Application not found"
         )
     
-    await db.applications.delete_one({"id": application_id})
+    if holds_seat(application["status"]):
+        await free_seat(db, application)
+    elif application["status"] == ApplicationStatus.WAITLISTED:
+        await leave_waitlist(db, application)
+    publish_seat_changes([application])
+    await record_counter_change(application_added(application["status"], -1))
     return {"message": "Application deleted successfully"}
\ No newline at end of file
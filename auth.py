@@ -1,6 +1,4 @@
 from fastapi import APIRouter, HTTPException, status, Depends
-from google.auth.transport import requests as google_requests
-from google.oauth2 import id_token
 from datetime import datetime
 import os
 import sys
@@ -13,11 +11,33 @@ sys.path.append(str(backend_dir))
 
 from server import (
     db, UserCreate, UserLogin, GoogleAuthData, User, UserResponse,
-    hash_password, verify_password, create_jwt_token, get_current_user
+    hash_password, verify_password, create_jwt_token, create_token_pair,
+    verify_jwt_token, get_current_user, get_current_user_document,
+    invalidate_cached_user, google_verifier, GOOGLE_VERIFY_ID_TOKEN
 )
 
+from counters import bump_counters
+from rollups import record_rollup, user_created
+from admission import RoutePolicy, RateLimit
+
 router = APIRouter(prefix="/api/auth", tags=["Authentication"])
 
+# Unauthenticated and bcrypt-bound; enforced by the admission middleware in server.py
+ADMISSION_POLICIES = {
+    # A few sign-ups per address, and not many per IP
+    ("POST", "/api/auth/register"): RoutePolicy(
+        max_concurrency=16,
+        per_ip=RateLimit(rate=0.2, burst=5),
+        per_email=RateLimit(rate=1 / 60, burst=3)
+    ),
+    # Enough for typos, not for password guessing against one account
+    ("POST", "/api/auth/login"): RoutePolicy(
+        max_concurrency=32,
+        per_ip=RateLimit(rate=1.0, burst=10),
+        per_email=RateLimit(rate=0.1, burst=5)
+    ),
+}
+
 @router.post("/register", response_model=dict)
 async def register_user(user_data: UserCreate):
     # Check if user already exists
@@ -29,7 +49,7 @@ async def register_user(user_data: UserCreate):
         )
     
     # Create new user
-    hashed_password = hash_password(user_data.password)
+    hashed_password = await hash_password(user_data.password)
     user = User(
         name=user_data.name,
         email=user_data.email,
@@ -41,6 +61,8 @@ async def register_user(user_data: UserCreate):
     
     # Insert user into database
     result = await db.users.insert_one(user_dict)
+    await bump_counters(db, {"users.active": 1})
+    await record_rollup(db, user_created())
     
     # Create JWT token
     token_data = {
@@ -49,11 +71,11 @@ async def register_user(user_data: UserCreate):
         "name": user.name,
         "role": user.role
     }
-    token = create_jwt_token(token_data)
+    tokens = create_token_pair(token_data)
     
     return {
         "message": "User registered successfully",
-        "token": token,
+        **tokens,
         "user": UserResponse(**user.dict())
     }
 
@@ -68,7 +90,7 @@ async def login_user(login_data: UserLogin):
         )
     
     # Verify password
-    if not verify_password(login_data.password, user["password"]):
+    if not await verify_password(login_data.password, user["password"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
@@ -88,20 +110,43 @@ async def login_user(login_data: UserLogin):
         "name": user["name"],
         "role": user["role"]
     }
-    token = create_jwt_token(token_data)
+    tokens = create_token_pair(token_data)
     
     return {
         "message": "Login successful",
-        "token": token,
+        **tokens,
         "user": UserResponse(**user)
     }
 
 @router.post("/google", response_model=dict)
 async def google_auth(auth_data: GoogleAuthData):
+    if GOOGLE_VERIFY_ID_TOKEN:
+        if not auth_data.credential:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Google credential is required"
+            )
+        try:
+            claims = await google_verifier.verify(auth_data.credential)
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail=f"Invalid Google credential: {str(e)}"
+            )
+        if not claims.get("email_verified", False):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Google account email is not verified"
+            )
+        # Identity comes from the verified token, not the request body
+        auth_data = GoogleAuthData(
+            google_id=claims["sub"],
+            name=claims.get("name") or auth_data.name,
+            email=claims["email"],
+            picture=claims.get("picture", auth_data.picture)
+        )
+    
     try:
-        # Verify Google token (in production, implement proper verification)
-        # For now, we'll trust the frontend verification
-        
         # Check if user already exists
         user = await db.users.find_one({"email": auth_data.email})
         
@@ -117,6 +162,7 @@ async def google_auth(auth_data: GoogleAuthData):
                     }
                 }
             )
+            invalidate_cached_user(user["id"])
         else:
             # Create new user
             new_user = User(
@@ -129,6 +175,8 @@ async def google_auth(auth_data: GoogleAuthData):
             user_dict["password"] = None  # No password for Google users
             
             await db.users.insert_one(user_dict)
+            await bump_counters(db, {"users.active": 1})
+            await record_rollup(db, user_created())
             user = user_dict
         
         # Create JWT token
@@ -138,11 +186,11 @@ async def google_auth(auth_data: GoogleAuthData):
             "name": user["name"],
             "role": user["role"]
         }
-        token = create_jwt_token(token_data)
+        tokens = create_token_pair(token_data)
         
         return {
             "message": "Google authentication successful",
-            "token": token,
+            **tokens,
             "user": UserResponse(**user)
         }
         
@@ -152,8 +200,46 @@ async def google_auth(auth_data: GoogleAuthData):
             detail=f"Google authentication failed: {str(e)}"
         )
 
+@router.post("/refresh", response_model=dict)
+async def refresh_access_token(refresh_data: dict):
+    refresh_token = refresh_data.get("refresh_token")
+    if not refresh_token:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="refresh_token is required"
+        )
+    
+    payload = verify_jwt_token(refresh_token)
+    if payload.get("type") != "refresh":
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token type"
+        )
+    
+    # Re-check the user so role changes and deactivation are picked up here
+    user = await db.users.find_one({"id": payload["id"]})
+    if not user or not user.get("is_active", True):
+        invalidate_cached_user(payload["id"])
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found or inactive"
+        )
+    
+    token_data = {
+        "id": user["id"],
+        "email": user["email"],
+        "name": user["name"],
+        "role": user["role"]
+    }
+    
+    return {
+        "message": "Token refreshed",
+        "token": create_jwt_token(token_data),
+        "refresh_token": refresh_token
+    }
+
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_info(current_user: dict = Depends(get_current_user)):
+async def get_current_user_info(current_user: dict = Depends(get_current_user_document)):
     return UserResponse(**current_user)
 
 @router.put("/profile", response_model=UserResponse)
@@ -174,6 +260,7 @@ async def update_profile(profile_data: dict, current_user: dict = Depends(get_cu
         {"id": current_user["id"]},
         {"$set": update_data}
     )
+    invalidate_cached_user(current_user["id"])
     
     updated_user = await db.users.find_one({"id": current_user["id"]})
     return UserResponse(**updated_user)
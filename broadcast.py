@@ -0,0 +1,154 @@
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Dict, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+DASHBOARD_TOPIC = "dashboard"
+REGISTRATIONS_TOPIC = "registrations"
+
+# Sent instead of the dropped backlog when a subscriber can't keep up
+RESYNC = {"event": "resync", "data": {}}
+
+class SubscriberLimit(Exception):
+    pass
+
+class Subscriber:
+    def __init__(self, topic: str, queue_size: int):
+        self.topic = topic
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.resyncs = 0
+
+    def offer(self, message: dict) -> bool:
+        """Queue a message without waiting. Returns False if the subscriber was lagging."""
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            # Deltas in the backlog are useless once one is lost; drop them all
+            # and tell the client to refetch its snapshot
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+            self.resyncs += 1
+            return False
+
+    async def next(self, timeout: float) -> Optional[dict]:
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+class BroadcastHub:
+    """In-process fan-out of change notifications to SSE subscribers.
+
+    Writers call publish() with a dict of numeric changes; changes to a
+    topic within `coalesce_window` seconds are summed into one pending
+    dict and delivered as a single message. A topic may register a resolver
+    that turns the pending dict into the payload (e.g. one query for the
+    current values of every touched key), so a burst costs one query no
+    matter how many clients listen. Publishing never blocks: a subscriber
+    whose queue is full is reset to a single "resync" message.
+    """
+
+    def __init__(self, coalesce_window: float = 0.25, queue_size: int = 32):
+        self.coalesce_window = coalesce_window
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[Subscriber]] = {}
+        self._pending: Dict[str, Dict[str, int]] = {}
+        self._resolvers: Dict[str, Callable[[Dict[str, int]], Awaitable[dict]]] = {}
+        # Per topic: (max subscribers, max per client key), and the live per-client counts
+        self._limits: Dict[str, Tuple[Optional[int], Optional[int]]] = {}
+        self._client_counts: Dict[Tuple[str, str], int] = {}
+        # The loop only keeps weak references to tasks; hold flushes until they finish
+        self._flush_tasks: Set[asyncio.Task] = set()
+        self.published = 0
+        self.flushes = 0
+        self.resyncs = 0
+        self.rejected = 0
+
+    def register_resolver(self, topic: str, resolver: Callable[[Dict[str, int]], Awaitable[dict]]) -> None:
+        self._resolvers[topic] = resolver
+
+    def limit_subscribers(
+        self, topic: str, max_subscribers: Optional[int] = None, max_per_client: Optional[int] = None
+    ) -> None:
+        self._limits[topic] = (max_subscribers, max_per_client)
+
+    def can_subscribe(self, topic: str, client: Optional[str] = None) -> bool:
+        max_subscribers, max_per_client = self._limits.get(topic, (None, None))
+        if max_subscribers is not None and len(self._subscribers.get(topic, ())) >= max_subscribers:
+            return False
+        if max_per_client is not None and client is not None:
+            return self._client_counts.get((topic, client), 0) < max_per_client
+        return True
+
+    def publish(self, topic: str, changes: dict) -> None:
+        changes = {key: delta for key, delta in changes.items() if delta}
+        if not changes or not self._subscribers.get(topic):
+            return
+        self.published += 1
+        pending = self._pending.get(topic)
+        if pending is None:
+            pending = self._pending[topic] = {}
+            asyncio.get_running_loop().call_later(self.coalesce_window, self._start_flush, topic)
+        for key, delta in changes.items():
+            pending[key] = pending.get(key, 0) + delta
+
+    def _start_flush(self, topic: str) -> None:
+        task = asyncio.ensure_future(self._flush(topic))
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    async def _flush(self, topic: str) -> None:
+        pending = self._pending.pop(topic, None)
+        subscribers = self._subscribers.get(topic)
+        if not pending or not subscribers:
+            return
+        try:
+            resolver = self._resolvers.get(topic)
+            data = await resolver(pending) if resolver else {"changes": pending}
+        except Exception:
+            logger.exception("Resolving %s broadcast failed", topic)
+            data = None
+        message = {"event": topic, "data": data} if data is not None else RESYNC
+        self.flushes += 1
+        for subscriber in list(subscribers):
+            if not subscriber.offer(message):
+                self.resyncs += 1
+
+    @asynccontextmanager
+    async def subscribe(self, topic: str, client: Optional[str] = None):
+        """Register a subscriber; raises SubscriberLimit past the topic's limits."""
+        if not self.can_subscribe(topic, client):
+            self.rejected += 1
+            raise SubscriberLimit(topic)
+        subscriber = Subscriber(topic, self.queue_size)
+        self._subscribers.setdefault(topic, set()).add(subscriber)
+        client_key = (topic, client)
+        if client is not None:
+            self._client_counts[client_key] = self._client_counts.get(client_key, 0) + 1
+        try:
+            yield subscriber
+        finally:
+            self._subscribers[topic].discard(subscriber)
+            if client is not None:
+                remaining = self._client_counts.get(client_key, 1) - 1
+                if remaining:
+                    self._client_counts[client_key] = remaining
+                else:
+                    self._client_counts.pop(client_key, None)
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": {topic: len(subscribers) for topic, subscribers in self._subscribers.items()},
+            "published": self.published,
+            "flushes": self.flushes,
+            "resyncs": self.resyncs,
+            "rejected": self.rejected
+        }
+
+def sse_message(message: dict) -> str:
+    return f"event: {message['event']}\ndata: {json.dumps(message['data'], default=str, separators=(',', ':'))}\n\n"
@@ -0,0 +1,76 @@
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from fastapi import HTTPException, status
+
+# Upper bound on how many documents one bulk request may touch. Filter-based
+# requests beyond it process the oldest matches first and report has_more.
+BULK_MAX_ITEMS = 1000
+
+def bulk_stamp() -> datetime:
+    # Mongo keeps millisecond precision, so trim to make the stamp comparable
+    now = datetime.utcnow()
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+async def resolve_targets(
+    collection,
+    ids: Optional[List[str]],
+    filter_dict: Optional[dict],
+    projection: dict
+) -> Tuple[List[dict], List[str], bool]:
+    """Load the documents a bulk request addresses in a single query.
+
+    Returns the documents found, the requested ids that don't exist and
+    whether a filter matched more than BULK_MAX_ITEMS documents.
+    """
+    if (ids is None) == (filter_dict is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide either ids or filters"
+        )
+
+    projection = {"_id": 0, "id": 1, **projection}
+    if ids is not None:
+        unique_ids = list(dict.fromkeys(ids))
+        if len(unique_ids) > BULK_MAX_ITEMS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"At most {BULK_MAX_ITEMS} ids per request"
+            )
+        docs = await collection.find({"id": {"$in": unique_ids}}, projection).to_list(len(unique_ids))
+        found = {doc["id"] for doc in docs}
+        return docs, [doc_id for doc_id in unique_ids if doc_id not in found], False
+
+    docs = await collection.find(filter_dict, projection).sort("created_at", 1).limit(BULK_MAX_ITEMS + 1).to_list(BULK_MAX_ITEMS + 1)
+    return docs[:BULK_MAX_ITEMS], [], len(docs) > BULK_MAX_ITEMS
+
+async def confirm_updated(collection, ids: Iterable[str], marker: dict, session=None) -> set:
+    """Ids among `ids` that carry the marker fields written by this request.
+
+    Only needed when a bulk write matched fewer documents than planned,
+    i.e. some rows changed underneath the request.
+    """
+    docs = await collection.find(
+        {"id": {"$in": list(ids)}, **marker}, {"_id": 0, "id": 1}, session=session
+    ).to_list(None)
+    return {doc["id"] for doc in docs}
+
+def merge_changes(changes: Iterable[dict]) -> Dict[str, int]:
+    merged: Dict[str, int] = {}
+    for change in changes:
+        for field, delta in change.items():
+            merged[field] = merged.get(field, 0) + delta
+    return merged
+
+def outcome(doc_id: str, result: str, detail: Optional[str] = None) -> dict:
+    entry = {"id": doc_id, "result": result}
+    if detail:
+        entry["detail"] = detail
+    return entry
+
+def bulk_report(results: List[dict], has_more: bool) -> dict:
+    return {
+        "requested": len(results),
+        "updated": sum(1 for entry in results if entry["result"] == "updated"),
+        "has_more": has_more,
+        "results": results
+    }
@@ -0,0 +1,95 @@
+from datetime import datetime
+from enum import Enum
+from typing import List, Optional
+from pydantic import BaseModel, Field
+import uuid
+
+# Catalogue models live outside server.py so scripts (import_catalogue.py)
+# can validate against them without constructing the app
+
+class EventStatus(str, Enum):
+    UPCOMING = "upcoming"
+    ONGOING = "ongoing"
+    COMPLETED = "completed"
+
+class ProgramCategory(str, Enum):
+    INCUBATION = "incubation"
+    COURSES = "courses"
+    INTERNSHIP = "internship"
+    EMPLOYMENT = "employment"
+
+class ProgramCreate(BaseModel):
+    title: str = Field(..., min_length=3, max_length=200)
+    description: str = Field(..., min_length=10)
+    features: List[str]
+    duration: str
+    category: ProgramCategory
+    image: Optional[str] = None
+    max_participants: Optional[int] = None
+    waitlist_enabled: bool = False
+
+class Program(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    title: str
+    description: str
+    features: List[str]
+    duration: str
+    category: ProgramCategory
+    image: Optional[str]
+    is_active: bool = True
+    max_participants: Optional[int]
+    current_participants: int = 0
+    waitlist_enabled: bool = False
+    waitlist_size: int = 0
+    created_by: str
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+class EventCreate(BaseModel):
+    title: str = Field(..., min_length=3, max_length=200)
+    description: str = Field(..., min_length=10)
+    date: str
+    type: str
+    participants: str
+    prizes: str
+    status: EventStatus = EventStatus.UPCOMING
+    image: Optional[str] = None
+    max_registrations: Optional[int] = None
+    waitlist_enabled: bool = False
+
+class Event(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    title: str
+    description: str
+    date: str
+    type: str
+    participants: str
+    prizes: str
+    status: EventStatus
+    image: Optional[str]
+    max_registrations: Optional[int]
+    current_registrations: int = 0
+    waitlist_enabled: bool = False
+    waitlist_size: int = 0
+    created_by: str
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+class SuccessStoryCreate(BaseModel):
+    name: str = Field(..., min_length=2, max_length=100)
+    company: str = Field(..., min_length=2, max_length=200)
+    story: str = Field(..., min_length=10)
+    achievement: str = Field(..., min_length=3, max_length=200)
+    image: Optional[str] = None
+
+class SuccessStory(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    name: str
+    company: str
+    story: str
+    achievement: str
+    image: Optional[str]
+    is_published: bool = True
+    created_by: str
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
\ No newline at end of file
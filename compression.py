@@ -0,0 +1,55 @@
+import gzip
+from typing import Dict, Optional
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Preferred first when the client accepts several with the same q-value
+SUPPORTED_ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+def compress_variants(body: bytes, min_size: int) -> Dict[str, bytes]:
+    """Compressed copies of `body`, one per supported encoding.
+
+    Bodies below `min_size` are left alone, as are variants that would not
+    come out smaller than the original.
+    """
+    if len(body) < min_size:
+        return {}
+    variants = {"gzip": gzip.compress(body, compresslevel=GZIP_LEVEL)}
+    if brotli is not None:
+        variants["br"] = brotli.compress(body, quality=BROTLI_QUALITY)
+    return {encoding: data for encoding, data in variants.items() if len(data) < len(body)}
+
+def _accepted(accept_encoding: str) -> Dict[str, float]:
+    accepted = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        if not token:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[token.strip().lower()] = quality
+    return accepted
+
+def negotiate(accept_encoding: Optional[str], available) -> Optional[str]:
+    """Pick the encoding to send from the variants `available`, or None for identity."""
+    if not accept_encoding or not available:
+        return None
+    accepted = _accepted(accept_encoding)
+    best, best_quality = None, 0.0
+    for encoding in SUPPORTED_ENCODINGS:
+        if encoding not in available:
+            continue
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
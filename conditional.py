@@ -0,0 +1,90 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterable, Optional, Tuple
+from fastapi import Request, Response
+
+# Just enough of a document to derive its validators
+VALIDATOR_PROJECTION = {"_id": 0, "id": 1, "updated_at": 1}
+PUBLIC_CACHE_CONTROL = "public, no-cache"
+
+def _field(item, name: str):
+    return item.get(name) if isinstance(item, dict) else getattr(item, name, None)
+
+def _as_utc(value: datetime) -> datetime:
+    # Mongo hands back naive datetimes that are already UTC
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+def compute_validators(items: Iterable) -> Tuple[str, Optional[datetime]]:
+    """Strong ETag and Last-Modified for one or more documents.
+
+    The ETag is a digest of every (id, updated_at) pair, sorted by id so the
+    result does not depend on the order Mongo returns them in. Anything that
+    changes what a resource shows must therefore bump its updated_at.
+    """
+    stamps = []
+    last_modified = None
+    for item in items:
+        updated_at = _field(item, "updated_at")
+        if updated_at is not None:
+            updated_at = _as_utc(updated_at).replace(microsecond=updated_at.microsecond // 1000 * 1000)
+            if last_modified is None or updated_at > last_modified:
+                last_modified = updated_at
+        stamps.append(f"{_field(item, 'id')}@{updated_at.isoformat() if updated_at else ''}")
+    digest = hashlib.sha1("\n".join(sorted(stamps)).encode("utf-8")).hexdigest()
+    return f'"{digest}"', last_modified
+
+def list_validators(items: Iterable) -> Tuple[str, Optional[datetime]]:
+    """ETag only: a list's newest updated_at doesn't move when an item leaves it.
+
+    Deleting, unpublishing or deactivating a row changes the ETag digest but
+    leaves the remaining rows' stamps alone, so If-Modified-Since would 304.
+    """
+    etag, _ = compute_validators(items)
+    return etag, None
+
+def encoded_etag(etag: str, encoding: Optional[str]) -> str:
+    # A strong tag must be unique per representation, so each Content-Encoding gets its own
+    return f'{etag[:-1]}-{encoding}"' if encoding else etag
+
+def matching_etag(request: Request, etags: Iterable[str]) -> Optional[str]:
+    """The tag among `etags` that If-None-Match names, if any."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is None:
+        return None
+    etags = list(etags)
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    if "*" in candidates:
+        return etags[0]
+    candidates = [tag[2:] if tag.startswith("W/") else tag for tag in candidates]
+    return next((etag for etag in etags if etag in candidates), None)
+
+def request_is_conditional(request: Request) -> bool:
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    if "if-none-match" in request.headers:
+        # If-None-Match wins over If-Modified-Since when both are sent
+        return matching_etag(request, [etag]) is not None
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = _as_utc(parsedate_to_datetime(if_modified_since))
+        except (TypeError, ValueError):
+            return False
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+def validator_headers(etag: str, last_modified: Optional[datetime]) -> dict:
+    headers = {"ETag": etag, "Cache-Control": PUBLIC_CACHE_CONTROL}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+    return headers
+
+def apply_validators(response: Response, etag: str, last_modified: Optional[datetime]) -> None:
+    for name, value in validator_headers(etag, last_modified).items():
+        response.headers[name] = value
+
+def not_modified(etag: str, last_modified: Optional[datetime]) -> Response:
+    return Response(status_code=304, headers=validator_headers(etag, last_modified))
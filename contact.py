@@ -1,35 +1,67 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Response
 from typing import List, Optional
 from datetime import datetime
 from ..server import (
-    db, Contact, ContactCreate, ContactStatus, get_current_user, require_role, UserRole
+    db, client, Contact, ContactCreate, ContactStatus, BulkContactStatusUpdate,
+    get_current_user, require_role, UserRole, record_counter_change, MAIL_ENABLED
+)
+from ..pagination import paginate, set_next_cursor
+from ..serialization import shape_many, fast_response
+from ..lookup import SEARCH_KEYS_FIELD, contact_search_keys, lookup_filter, lookup_page
+from ..outbox import outbox_message, write_with_outbox
+from ..admission import RoutePolicy, RateLimit
+from ..counters import contact_added, moved
+from ..rollups import record_rollup, contact_created, status_transition
+from ..bulk import (
+    resolve_targets, confirm_updated, merge_changes, bulk_stamp, outcome, bulk_report
 )
 
 router = APIRouter(prefix="/api", tags=["Contact"])
 
+# Public form; enforced by the admission middleware in server.py
+ADMISSION_POLICIES = {
+    ("POST", "/api/contact"): RoutePolicy(
+        max_concurrency=16,
+        per_ip=RateLimit(rate=0.1, burst=5),
+        per_email=RateLimit(rate=1 / 60, burst=3)
+    ),
+}
+
 # Public endpoint - submit contact form
 @router.post("/contact", response_model=Contact)
 async def submit_contact(
     contact_data: ContactCreate
 ):
     contact = Contact(**contact_data.dict())
-    await db.contacts.insert_one(contact.dict())
+    document = contact.dict()
+    document[SEARCH_KEYS_FIELD] = contact_search_keys(document)
+    await db.contacts.insert_one(document)
+    await record_counter_change(contact_added(contact.status))
+    await record_rollup(db, contact_created(contact.status))
     return contact
 
 # Admin endpoints
 @router.get("/admin/contacts", response_model=List[Contact])
 async def get_all_contacts(
+    response: Response,
     current_user: dict = Depends(require_role(UserRole.EDITOR)),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    status_filter: Optional[ContactStatus] = None
+    cursor: Optional[str] = None,
+    status_filter: Optional[ContactStatus] = None,
+    q: Optional[str] = None
 ):
     filter_dict = {}
     if status_filter:
         filter_dict["status"] = status_filter
-    
-    contacts = await db.contacts.find(filter_dict).skip(skip).limit(limit).to_list(limit)
-    return [Contact(**contact) for contact in contacts]
+    if q:
+        # Prefix of the sender's name, email, subject or phone; paged in index order
+        filter_dict.update(lookup_filter(q))
+        contacts = await lookup_page(db.contacts, filter_dict, limit, skip, cursor)
+    else:
+        contacts, next_cursor = await paginate(db.contacts, filter_dict, limit, skip, cursor)
+        set_next_cursor(response, next_cursor)
+    return fast_response(shape_many(Contact, contacts), response)
 
 @router.get("/admin/contacts/{contact_id}", response_model=Contact)
 async def get_contact_details(
@@ -45,10 +77,14 @@ async def get_contact_details(
     
     # Mark as read if it's unread
     if contact["status"] == ContactStatus.UNREAD:
-        await db.contacts.update_one(
-            {"id": contact_id},
+        result = await db.contacts.update_one(
+            {"id": contact_id, "status": ContactStatus.UNREAD},
             {"$set": {"status": ContactStatus.read, "updated_at": datetime.utcnow()}}
         )
+        # Concurrent viewers race to mark it read; only the one that did counts it
+        if result.modified_count:
+            await record_counter_change(moved("contacts.status", ContactStatus.UNREAD, ContactStatus.read))
+            await record_rollup(db, status_transition("contacts", ContactStatus.UNREAD, ContactStatus.read))
         contact["status"] = ContactStatus.read
     
     return Contact(**contact)
@@ -81,12 +117,89 @@ async def reply_to_contact(
         "updated_at": datetime.utcnow()
     }
     
-    await db.contacts.update_one(
-        {"id": contact_id},
-        {"$set": update_data}
+    # The reply is queued for the mail worker in the same transaction as the update
+    reply = outbox_message(
+        "contact_reply",
+        to=contact["email"],
+        subject=f"Re: {contact['subject']}",
+        body=reply_message,
+        ref=contact_id
     )
     
-    return {"message": "Reply sent successfully"}
+    async def write_reply(session):
+        result = await db.contacts.update_one(
+            {"id": contact_id, "status": contact["status"]},
+            {"$set": update_data},
+            session=session
+        )
+        return result.modified_count > 0
+    
+    if not await write_with_outbox(client, db, write_reply, [reply] if MAIL_ENABLED else []):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Contact was changed by someone else, reload and retry"
+        )
+    await record_counter_change(moved("contacts.status", contact["status"], ContactStatus.REPLIED))
+    await record_rollup(db, status_transition("contacts", contact["status"], ContactStatus.REPLIED))
+    
+    if not MAIL_ENABLED:
+        return {"message": "Reply saved, mail is not configured so it was not sent"}
+    return {"message": "Reply queued for sending"}
+
+@router.post("/admin/contacts/bulk/status")
+async def bulk_update_contact_status(
+    bulk_data: BulkContactStatusUpdate,
+    current_user: dict = Depends(require_role(UserRole.EDITOR))
+):
+    filter_dict = None
+    if bulk_data.filters is not None:
+        filter_dict = {}
+        if bulk_data.filters.get("status_filter"):
+            if bulk_data.filters["status_filter"] not in [s.value for s in ContactStatus]:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid filters"
+                )
+            filter_dict["status"] = bulk_data.filters["status_filter"]
+    
+    contacts, missing, has_more = await resolve_targets(db.contacts, bulk_data.ids, filter_dict, {"status": 1})
+    results = [outcome(contact_id, "not_found") for contact_id in missing]
+    
+    new_status = bulk_data.status.value
+    stamp = bulk_stamp()
+    
+    # One update_many per current status keeps the change conditional on
+    # what was read, which the counters rely on
+    by_status = {}
+    for contact in contacts:
+        if contact["status"] == new_status:
+            results.append(outcome(contact["id"], "unchanged"))
+        else:
+            by_status.setdefault(contact["status"], []).append(contact["id"])
+    
+    for old_status, contact_ids in by_status.items():
+        result = await db.contacts.update_many(
+            {"id": {"$in": contact_ids}, "status": old_status},
+            {"$set": {"status": new_status, "updated_at": stamp}}
+        )
+        if result.modified_count == len(contact_ids):
+            updated_ids = set(contact_ids)
+        else:
+            updated_ids = await confirm_updated(db.contacts, contact_ids, {"status": new_status, "updated_at": stamp})
+        for contact_id in contact_ids:
+            if contact_id in updated_ids:
+                results.append(outcome(contact_id, "updated"))
+            else:
+                results.append(outcome(contact_id, "conflict", "Changed by someone else"))
+        
+        await record_counter_change(merge_changes(
+            moved("contacts.status", old_status, new_status) for _ in updated_ids
+        ))
+        await record_rollup(db, merge_changes(
+            status_transition("contacts", old_status, new_status) for _ in updated_ids
+        ))
+    
+    return bulk_report(results, has_more)
 
 @router.put("/admin/contacts/{contact_id}/status")
 async def update_contact_status(
@@ -108,10 +221,17 @@ async def update_contact_status(
             detail="Invalid status"
         )
     
-    await db.contacts.update_one(
-        {"id": contact_id},
+    result = await db.contacts.update_one(
+        {"id": contact_id, "status": contact["status"]},
         {"$set": {"status": new_status, "updated_at": datetime.utcnow()}}
     )
+    if not result.modified_count:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Contact was changed by someone else, reload and retry"
+        )
+    await record_counter_change(moved("contacts.status", contact["status"], new_status))
+    await record_rollup(db, status_transition("contacts", contact["status"], new_status))
     
     return {"message": "Contact status updated successfully"}
 
@@ -120,12 +240,13 @@ async def delete_contact(
     contact_id: str,
     current_user: dict = Depends(require_role(UserRole.MANAGER))
 ):
-    contact = await db.contacts.find_one({"id": contact_id})
+    # Counters are adjusted from the document actually removed, so racing deletes count once
+    contact = await db.contacts.find_one_and_delete({"id": contact_id})
     if not contact:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Contact not found"
         )
     
-    await db.contacts.delete_one({"id": contact_id})
+    await record_counter_change(contact_added(contact["status"], -1))
     return {"message": "Contact deleted successfully"}
\ No newline at end of file
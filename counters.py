@@ -0,0 +1,115 @@
+from datetime import datetime
+from enum import Enum
+
+# Dashboard totals live in a single document of the `stats` collection and
+# are moved with $inc by every write path that changes them. The $inc is a
+# separate operation from the source write, so a crash between the two can
+# leave the counters off by one; rebuild_counters() recomputes them from the
+# source collections.
+#
+# `version` goes up with every change, so a client holding a snapshot can
+# tell whether a live message is newer than what it already shows.
+STATS_ID = "dashboard"
+
+def _key(value) -> str:
+    return value.value if isinstance(value, Enum) else str(value)
+
+async def bump_counters(db, changes: dict) -> None:
+    changes = {field: delta for field, delta in changes.items() if delta}
+    if not changes:
+        return
+    await db.stats.update_one(
+        {"_id": STATS_ID},
+        {"$inc": {**changes, "version": 1}, "$set": {"updated_at": datetime.utcnow()}},
+        upsert=True
+    )
+
+def moved(path: str, old_value, new_value) -> dict:
+    # One document moving between buckets, e.g. moved("applications.status", "PENDING", "APPROVED")
+    old_key, new_key = _key(old_value), _key(new_value)
+    if old_key == new_key:
+        return {}
+    return {f"{path}.{old_key}": -1, f"{path}.{new_key}": 1}
+
+def application_added(status, delta: int = 1) -> dict:
+    return {"applications.total": delta, f"applications.status.{_key(status)}": delta}
+
+def contact_added(status, delta: int = 1) -> dict:
+    return {"contacts.total": delta, f"contacts.status.{_key(status)}": delta}
+
+def program_activated(category, delta: int = 1) -> dict:
+    return {"programs.active": delta, f"programs.category.{_key(category)}": delta}
+
+async def _group_counts(collection, field: str, match: dict = None) -> dict:
+    pipeline = [{"$match": match}] if match else []
+    pipeline.append({"$group": {"_id": f"${field}", "count": {"$sum": 1}}})
+    return {_key(stat["_id"]): stat["count"] for stat in await collection.aggregate(pipeline).to_list(100)}
+
+async def rebuild_counters(db) -> dict:
+    """Recompute every counter from the source collections and replace the document."""
+    application_statuses = await _group_counts(db.applications, "status")
+    contact_statuses = await _group_counts(db.contacts, "status")
+    program_categories = await _group_counts(db.programs, "category", {"is_active": True})
+
+    counters = {
+        "users": {"active": await db.users.count_documents({"is_active": True})},
+        "programs": {
+            "active": sum(program_categories.values()),
+            "category": program_categories
+        },
+        "events": {"total": await db.events.count_documents({})},
+        "applications": {
+            "total": sum(application_statuses.values()),
+            "status": application_statuses
+        },
+        "contacts": {
+            "total": sum(contact_statuses.values()),
+            "status": contact_statuses
+        },
+        "success_stories": {"published": await db.success_stories.count_documents({"is_published": True})},
+        "updated_at": datetime.utcnow(),
+        "reconciled_at": datetime.utcnow()
+    }
+    previous = await db.stats.find_one({"_id": STATS_ID}, {"_id": 0, "version": 1})
+    counters["version"] = (previous or {}).get("version", 0) + 1
+    await db.stats.replace_one({"_id": STATS_ID}, counters, upsert=True)
+    return counters
+
+def dashboard_sections(counters: dict) -> dict:
+    """The counter-backed totals and breakdowns shown on the dashboard."""
+    def section(name: str) -> dict:
+        return counters.get(name, {})
+
+    def breakdown(name: str, field: str) -> dict:
+        # Buckets that have drained to zero are left out, as $group would
+        return {key: count for key, count in section(name).get(field, {}).items() if count}
+
+    return {
+        "counters_version": counters.get("version", 0),
+        "totals": {
+            "users": section("users").get("active", 0),
+            "programs": section("programs").get("active", 0),
+            "events": section("events").get("total", 0),
+            "applications": section("applications").get("total", 0),
+            "contacts": section("contacts").get("total", 0),
+            "success_stories": section("success_stories").get("published", 0)
+        },
+        "breakdowns": {
+            "application_status": breakdown("applications", "status"),
+            "contact_status": breakdown("contacts", "status"),
+            "program_categories": breakdown("programs", "category")
+        }
+    }
+
+async def live_dashboard_state(db, changes: dict) -> dict:
+    # Resolver for the live dashboard topic: current values rather than deltas,
+    # so a client can never double-apply a change its snapshot already had
+    return {"changes": changes, **dashboard_sections(await read_counters(db))}
+
+async def read_counters(db) -> dict:
+    counters = await db.stats.find_one({"_id": STATS_ID}, {"_id": 0})
+    if counters is None or "reconciled_at" not in counters:
+        # First read on a fresh database, or only partial $inc upserts so far
+        counters = await rebuild_counters(db)
+        counters.pop("_id", None)
+    return counters
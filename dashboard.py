@@ -1,109 +1,123 @@
-from fastapi import APIRouter, Depends
-from datetime import datetime, timedelta
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from datetime import date, datetime, timedelta
+import asyncio
+import os
 from ..server import db, get_current_user, require_role, UserRole
+from ..cache import TTLCache
+from ..counters import read_counters, rebuild_counters, dashboard_sections
+from ..rollups import GRANULARITIES, read_timeseries, backfill_rollups
 
 router = APIRouter(prefix="/api/admin", tags=["Admin - Dashboard"])
 
-@router.get("/dashboard")
-async def get_dashboard_stats(
-    current_user: dict = Depends(require_role(UserRole.EDITOR))
-):
-    # Get total counts
-    total_users = await db.users.count_documents({"is_active": True})
-    total_programs = await db.programs.count_documents({"is_active": True})
-    total_events = await db.events.count_documents({})
-    total_applications = await db.applications.count_documents({})
-    total_contacts = await db.contacts.count_documents({})
-    total_success_stories = await db.success_stories.count_documents({"is_published": True})
-    
-    # Get recent activity (last 30 days)
+DASHBOARD_SNAPSHOT_TTL_SECONDS = float(os.environ.get('DASHBOARD_SNAPSHOT_TTL_SECONDS', 15))
+dashboard_snapshot = TTLCache(maxsize=1, ttl=DASHBOARD_SNAPSHOT_TTL_SECONDS)
+_snapshot_lock = asyncio.Lock()
+
+async def build_dashboard_stats() -> dict:
     thirty_days_ago = datetime.utcnow() - timedelta(days=30)
+    recent = {"created_at": {"$gte": thirty_days_ago}}
     
-    recent_users = await db.users.count_documents({
-        "created_at": {"$gte": thirty_days_ago},
-        "is_active": True
-    })
-    
-    recent_applications = await db.applications.count_documents({
-        "created_at": {"$gte": thirty_days_ago}
-    })
-    
-    recent_contacts = await db.contacts.count_documents({
-        "created_at": {"$gte": thirty_days_ago}
-    })
-    
-    # Application status breakdown
-    application_stats = await db.applications.aggregate([
-        {
-            "$group": {
-                "_id": "$status",
-                "count": {"$sum": 1}
-            }
-        }
-    ]).to_list(10)
-    
-    application_status_breakdown = {stat["_id"]: stat["count"] for stat in application_stats}
-    
-    # Contact status breakdown
-    contact_stats = await db.contacts.aggregate([
-        {
-            "$group": {
-                "_id": "$status",
-                "count": {"$sum": 1}
-            }
-        }
-    ]).to_list(10)
-    
-    contact_status_breakdown = {stat["_id"]: stat["count"] for stat in contact_stats}
-    
-    # Program category breakdown
-    program_stats = await db.programs.aggregate([
-        {
-            "$match": {"is_active": True}
-        },
-        {
-            "$group": {
-                "_id": "$category",
-                "count": {"$sum": 1}
-            }
-        }
-    ]).to_list(10)
-    
-    program_category_breakdown = {stat["_id"]: stat["count"] for stat in program_stats}
-    
-    # Recent applications with details
-    recent_applications_detailed = await db.applications.find(
-        {},
-        {"form_data.name": 1, "type": 1, "status": 1, "created_at": 1}
-    ).sort("created_at", -1).limit(5).to_list(5)
-    
-    # Recent contacts with details
-    recent_contacts_detailed = await db.contacts.find(
-        {},
-        {"name": 1, "subject": 1, "status": 1, "created_at": 1}
-    ).sort("created_at", -1).limit(5).to_list(5)
+    # Totals and breakdowns come from the incrementally maintained counters;
+    # only the rolling 30-day window still touches the source collections
+    (
+        counters, recent_users, recent_applications, recent_contacts,
+        recent_applications_detailed, recent_contacts_detailed
+    ) = await asyncio.gather(
+        read_counters(db),
+        db.users.count_documents({"is_active": True, **recent}),
+        db.applications.count_documents(recent),
+        db.contacts.count_documents(recent),
+        db.applications.find(
+            {},
+            {"_id": 0, "id": 1, "form_data.name": 1, "type": 1, "status": 1, "created_at": 1}
+        ).sort("created_at", -1).limit(5).to_list(5),
+        db.contacts.find(
+            {},
+            {"_id": 0, "id": 1, "name": 1, "subject": 1, "status": 1, "created_at": 1}
+        ).sort("created_at", -1).limit(5).to_list(5)
+    )
     
     return {
-        "totals": {
-            "users": total_users,
-            "programs": total_programs,
-            "events": total_events,
-            "applications": total_applications,
-            "contacts": total_contacts,
-            "success_stories": total_success_stories
-        },
+        **dashboard_sections(counters),
         "recent_activity": {
             "new_users_30d": recent_users,
             "new_applications_30d": recent_applications,
             "new_contacts_30d": recent_contacts
         },
-        "breakdowns": {
-            "application_status": application_status_breakdown,
-            "contact_status": contact_status_breakdown,
-            "program_categories": program_category_breakdown
-        },
         "recent_items": {
             "applications": recent_applications_detailed,
             "contacts": recent_contacts_detailed
-        }
-    }
\ No newline at end of file
+        },
+        "counters_updated_at": counters.get("updated_at"),
+        "generated_at": datetime.utcnow()
+    }
+
+@router.get("/dashboard")
+async def get_dashboard_stats(
+    current_user: dict = Depends(require_role(UserRole.EDITOR))
+):
+    stats = dashboard_snapshot.get("stats")
+    if stats is None:
+        # Single flight - admins refreshing together share one rebuild
+        async with _snapshot_lock:
+            stats = dashboard_snapshot.get("stats")
+            if stats is None:
+                stats = await build_dashboard_stats()
+                dashboard_snapshot.set("stats", stats)
+    return stats
+
+@router.post("/dashboard/reconcile")
+async def reconcile_dashboard_counters(
+    current_user: dict = Depends(require_role(UserRole.OWNER))
+):
+    # Rebuild the counters from the source collections when they have drifted
+    counters = await rebuild_counters(db)
+    counters.pop("_id", None)
+    dashboard_snapshot.clear()
+    return {"message": "Dashboard counters rebuilt", "counters": counters}
+
+MAX_TIMESERIES_DAYS = 3660
+
+def _validate_range(from_date: date, to_date: date) -> None:
+    if from_date > to_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="from must not be after to"
+        )
+    if (to_date - from_date).days > MAX_TIMESERIES_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Range is limited to {MAX_TIMESERIES_DAYS} days"
+        )
+
+@router.get("/dashboard/timeseries")
+async def get_dashboard_timeseries(
+    current_user: dict = Depends(require_role(UserRole.EDITOR)),
+    from_date: date = Query(..., alias="from"),
+    to_date: date = Query(..., alias="to"),
+    granularity: str = "day"
+):
+    if granularity not in GRANULARITIES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"granularity must be one of: {', '.join(GRANULARITIES)}"
+        )
+    _validate_range(from_date, to_date)
+    
+    # Reads at most one bucket per day in the range
+    return {
+        "from": from_date,
+        "to": to_date,
+        "granularity": granularity,
+        "series": await read_timeseries(db, from_date, to_date, granularity)
+    }
+
+@router.post("/dashboard/timeseries/backfill")
+async def backfill_dashboard_timeseries(
+    current_user: dict = Depends(require_role(UserRole.OWNER)),
+    from_date: date = Query(..., alias="from"),
+    to_date: date = Query(..., alias="to")
+):
+    _validate_range(from_date, to_date)
+    written = await backfill_rollups(db, from_date, to_date)
+    return {"message": f"Backfilled {written} daily buckets"}
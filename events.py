@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request, Response
 from typing import List, Optional
 from datetime import datetime
 import sys
@@ -9,30 +9,66 @@ backend_dir = Path(__file__).parent.parent
 sys.path.append(str(backend_dir))
 
 from server import (
-    db, Event, EventCreate, EventStatus, get_current_user, require_role, UserRole
+    db, Event, EventCreate, EventStatus, get_current_user, require_role, UserRole,
+    catalogue_cache, live_hub
 )
+from pagination import paginate, set_next_cursor
+from counters import bump_counters
+from registration import promote_waitlist, seat_key
+from broadcast import REGISTRATIONS_TOPIC
+from conditional import (
+    VALIDATOR_PROJECTION, compute_validators, request_is_conditional, is_not_modified,
+    not_modified, apply_validators
+)
+from fieldsets import select_fields, fieldset_projection, fieldset_model, fieldset_response
+from serialization import shape, shape_many, fast_response
 
 router = APIRouter(prefix="/api", tags=["Events"])
 
 # Public endpoint - get all events
 @router.get("/events", response_model=List[Event])
-async def get_events(status_filter: Optional[EventStatus] = None):
+async def get_events(
+    request: Request,
+    status_filter: Optional[EventStatus] = None,
+    fields: Optional[str] = None
+):
     filter_dict = {}
     if status_filter:
         filter_dict["status"] = status_filter
+    selected = select_fields("events", Event, fields)
+    
+    async def load_events():
+        events = await db.events.find(filter_dict, fieldset_projection(selected)).to_list(1000)
+        item_model = fieldset_model(Event, selected)
+        return shape_many(item_model, events)
+    
+    async def probe_events():
+        return await db.events.find(filter_dict, VALIDATOR_PROJECTION).to_list(1000)
     
-    events = await db.events.find(filter_dict).to_list(1000)
-    return [Event(**event) for event in events]
+    return await catalogue_cache.respond("events", request, load_events, probe_events)
 
 # Public endpoint - get single event
 @router.get("/events/{event_id}", response_model=Event)
-async def get_event(event_id: str):
-    event = await db.events.find_one({"id": event_id})
+async def get_event(event_id: str, request: Request, response: Response, fields: Optional[str] = None):
+    selected = select_fields("events", Event, fields)
+    
+    # Revalidation only needs updated_at, not the whole document
+    if request_is_conditional(request):
+        stamp = await db.events.find_one({"id": event_id}, VALIDATOR_PROJECTION)
+        if stamp:
+            etag, last_modified = compute_validators([stamp])
+            if is_not_modified(request, etag, last_modified):
+                return not_modified(etag, last_modified)
+    
+    event = await db.events.find_one({"id": event_id}, fieldset_projection(selected))
     if not event:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Event not found"
         )
+    if selected is not None:
+        return fieldset_response(shape(fieldset_model(Event, selected), event), *compute_validators([event]))
+    apply_validators(response, *compute_validators([event]))
     return Event(**event)
 
 # Admin endpoints
@@ -47,21 +83,26 @@ async def create_event(
     )
     
     await db.events.insert_one(event.dict())
+    await bump_counters(db, {"events.total": 1})
+    catalogue_cache.invalidate("events")
     return event
 
 @router.get("/admin/events", response_model=List[Event])
 async def get_all_events_admin(
+    response: Response,
     current_user: dict = Depends(require_role(UserRole.EDITOR)),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
     status_filter: Optional[EventStatus] = None
 ):
     filter_dict = {}
     if status_filter:
         filter_dict["status"] = status_filter
     
-    events = await db.events.find(filter_dict).skip(skip).limit(limit).to_list(limit)
-    return [Event(**event) for event in events]
+    events, next_cursor = await paginate(db.events, filter_dict, limit, skip, cursor)
+    set_next_cursor(response, next_cursor)
+    return fast_response(shape_many(Event, events), response)
 
 @router.get("/admin/events/{event_id}", response_model=Event)
 async def get_event_admin(
@@ -96,6 +137,11 @@ async def update_event(
         {"id": event_id},
         {"$set": update_data}
     )
+    # A raised capacity frees seats for whoever is queued
+    await promote_waitlist(db, "EVENT", event_id)
+    if event.get("max_registrations") != event_data.max_registrations:
+        live_hub.publish(REGISTRATIONS_TOPIC, {seat_key("EVENT", event_id): 1})
+    catalogue_cache.invalidate("events")
     
     updated_event = await db.events.find_one({"id": event_id})
     return Event(**updated_event)
@@ -105,12 +151,14 @@ async def delete_event(
     event_id: str,
     current_user: dict = Depends(require_role(UserRole.MANAGER))
 ):
-    event = await db.events.find_one({"id": event_id})
+    # Only the call that actually removes the event counts it
+    event = await db.events.find_one_and_delete({"id": event_id})
     if not event:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Event not found"
         )
     
-    await db.events.delete_one({"id": event_id})
+    await bump_counters(db, {"events.total": -1})
+    catalogue_cache.invalidate("events")
     return {"message": "Event deleted successfully"}
\ No newline at end of file
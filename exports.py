@@ -0,0 +1,270 @@
+from fastapi import APIRouter, HTTPException, status, Depends, BackgroundTasks, Query
+from fastapi.responses import FileResponse
+from typing import List
+from datetime import datetime, timedelta
+import asyncio
+import csv
+import io
+import logging
+import uuid
+from ..server import (
+    db, ExportCreate, ExportJob, ExportFormat, ExportStatus, ApplicationStatus,
+    ContactStatus, UserRole, require_role, has_role, EXPORT_DIR, EXPORT_LEASE_SECONDS
+)
+from ..pagination import KEYSET_SORT
+from ..serialization import dumps
+
+router = APIRouter(prefix="/api/admin", tags=["Admin - Exports"])
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+# Jobs run as background tasks of the worker that accepted them; the lease is
+# renewed with every progress update, so a job whose lease ran out has lost its worker
+WORKER_ID = str(uuid.uuid4())
+# Spreadsheet apps evaluate cells starting with these as formulas
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+# Per collection: minimum role (matches the list endpoint), projection and CSV columns
+EXPORT_SOURCES = {
+    "applications": {
+        "min_role": UserRole.EDITOR,
+        "projection": {"_id": 0, "search_keys": 0},
+        "columns": [
+            "id", "user_id", "type", "program_id", "event_id", "status",
+            "form_data.name", "form_data.email", "form_data.phone",
+            "form_data.organization", "review_notes", "reviewed_by",
+            "reviewed_at", "created_at", "updated_at"
+        ]
+    },
+    "contacts": {
+        "min_role": UserRole.EDITOR,
+        "projection": {"_id": 0, "search_keys": 0},
+        "columns": [
+            "id", "name", "email", "phone", "subject", "message", "status",
+            "replied_by", "replied_at", "created_at", "updated_at"
+        ]
+    },
+    "users": {
+        "min_role": UserRole.MANAGER,
+        "projection": {"_id": 0, "password": 0},
+        "columns": [
+            "id", "name", "email", "phone", "role", "is_active",
+            "google_id", "created_at", "updated_at"
+        ]
+    }
+}
+
+def build_export_filter(export_data: ExportCreate) -> dict:
+    filter_dict = {}
+    if export_data.collection == "applications":
+        if export_data.status_filter:
+            if export_data.status_filter not in [s.value for s in ApplicationStatus]:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid status")
+            filter_dict["status"] = export_data.status_filter
+        if export_data.type_filter:
+            filter_dict["type"] = export_data.type_filter.value
+    elif export_data.collection == "contacts":
+        if export_data.status_filter:
+            if export_data.status_filter not in [s.value for s in ContactStatus]:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid status")
+            filter_dict["status"] = export_data.status_filter
+    elif export_data.collection == "users":
+        if export_data.role_filter:
+            filter_dict["role"] = export_data.role_filter.value
+        if export_data.is_active is not None:
+            filter_dict["is_active"] = export_data.is_active
+    return filter_dict
+
+def _lookup(doc: dict, dotted: str):
+    value = doc
+    for part in dotted.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+def _format_cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if hasattr(value, "value"):
+        return value.value
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        # Rows come from public forms; keep them as text when the file is opened
+        return f"'{value}"
+    return value
+
+def _export_path(job_id: str, export_format: str):
+    return EXPORT_DIR / f"{job_id}.{export_format}"
+
+def _lease() -> dict:
+    return {"worker": WORKER_ID, "lease_expires_at": datetime.utcnow() + timedelta(seconds=EXPORT_LEASE_SECONDS)}
+
+async def run_export(job_id: str):
+    job = await db.export_jobs.find_one({"id": job_id})
+    source = EXPORT_SOURCES[job["collection"]]
+    collection = db[job["collection"]]
+    path = _export_path(job_id, job["format"])
+    columns = source["columns"]
+
+    try:
+        total = await collection.count_documents(job["filters"])
+        await db.export_jobs.update_one(
+            {"id": job_id},
+            {"$set": {"status": ExportStatus.RUNNING, "total": total, **_lease(), "updated_at": datetime.utcnow()}}
+        )
+
+        EXPORT_DIR.mkdir(parents=True, exist_ok=True)
+        processed = 0
+        # Only one batch of rows is ever held in memory
+        with open(path, "w", newline="", encoding="utf-8") as export_file:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            if job["format"] == ExportFormat.CSV:
+                writer.writerow(columns)
+
+            cursor = collection.find(job["filters"], source["projection"]).sort(KEYSET_SORT).batch_size(BATCH_SIZE)
+            async for doc in cursor:
+                if job["format"] == ExportFormat.CSV:
+                    writer.writerow([_format_cell(_lookup(doc, column)) for column in columns])
+                else:
+                    buffer.write(dumps(doc).decode("utf-8"))
+                    buffer.write("\n")
+                processed += 1
+
+                if processed % BATCH_SIZE == 0:
+                    await asyncio.to_thread(export_file.write, buffer.getvalue())
+                    buffer.seek(0)
+                    buffer.truncate()
+                    await db.export_jobs.update_one(
+                        {"id": job_id},
+                        {"$set": {"processed": processed, **_lease(), "updated_at": datetime.utcnow()}}
+                    )
+
+            await asyncio.to_thread(export_file.write, buffer.getvalue())
+
+        await db.export_jobs.update_one(
+            {"id": job_id},
+            {"$set": {
+                "status": ExportStatus.COMPLETED,
+                "processed": processed,
+                "file_size": path.stat().st_size,
+                "completed_at": datetime.utcnow(),
+                "updated_at": datetime.utcnow()
+            }}
+        )
+    except Exception as e:
+        logger.exception("Export %s failed", job_id)
+        path.unlink(missing_ok=True)
+        await db.export_jobs.update_one(
+            {"id": job_id},
+            {"$set": {"status": ExportStatus.FAILED, "error": str(e), "updated_at": datetime.utcnow()}}
+        )
+
+async def fail_interrupted_exports():
+    # Background tasks die with their worker; only jobs whose lease ran out are
+    # failed, so exports still running on other workers are left alone
+    result = await db.export_jobs.update_many(
+        {
+            "status": {"$in": [ExportStatus.PENDING, ExportStatus.RUNNING]},
+            "$or": [{"lease_expires_at": {"$lt": datetime.utcnow()}}, {"lease_expires_at": None}]
+        },
+        {"$set": {"status": ExportStatus.FAILED, "error": "Interrupted, its worker stopped", "updated_at": datetime.utcnow()}}
+    )
+    if result.modified_count:
+        logger.warning("Marked %d interrupted export(s) as failed", result.modified_count)
+
+@router.post("/exports", response_model=ExportJob)
+async def create_export(
+    export_data: ExportCreate,
+    background_tasks: BackgroundTasks,
+    current_user: dict = Depends(require_role(UserRole.EDITOR))
+):
+    source = EXPORT_SOURCES.get(export_data.collection)
+    if not source:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported collection. Choose one of: {', '.join(EXPORT_SOURCES)}"
+        )
+
+    if not has_role(current_user, source["min_role"]):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"Insufficient permissions. Required: {source['min_role'].value}"
+        )
+
+    job = ExportJob(
+        collection=export_data.collection,
+        format=export_data.format,
+        filters=build_export_filter(export_data),
+        requested_by=current_user["id"]
+    )
+    await db.export_jobs.insert_one({**job.dict(), **_lease()})
+
+    background_tasks.add_task(run_export, job.id)
+    return job
+
+@router.get("/exports", response_model=List[ExportJob])
+async def get_exports(
+    current_user: dict = Depends(require_role(UserRole.EDITOR)),
+    limit: int = Query(50, ge=1, le=500)
+):
+    # Jobs orphaned after this worker started are only noticed once their lease runs out
+    await fail_interrupted_exports()
+    jobs = await db.export_jobs.find({"requested_by": current_user["id"]}).sort("created_at", -1).to_list(limit)
+    return [ExportJob(**job) for job in jobs]
+
+async def _get_own_export(job_id: str, current_user: dict) -> dict:
+    await fail_interrupted_exports()
+    job = await db.export_jobs.find_one({"id": job_id})
+    if not job or (job["requested_by"] != current_user["id"] and not has_role(current_user, UserRole.OWNER)):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Export not found"
+        )
+    return job
+
+@router.get("/exports/{job_id}", response_model=ExportJob)
+async def get_export(
+    job_id: str,
+    current_user: dict = Depends(require_role(UserRole.EDITOR))
+):
+    return ExportJob(**await _get_own_export(job_id, current_user))
+
+@router.get("/exports/{job_id}/download")
+async def download_export(
+    job_id: str,
+    current_user: dict = Depends(require_role(UserRole.EDITOR))
+):
+    job = await _get_own_export(job_id, current_user)
+    if job["status"] != ExportStatus.COMPLETED:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Export is {job['status']}"
+        )
+
+    path = _export_path(job_id, job["format"])
+    if not path.exists():
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Export file is no longer available"
+        )
+
+    media_type = "text/csv" if job["format"] == ExportFormat.CSV else "application/x-ndjson"
+    # FileResponse streams the file in chunks rather than loading it
+    return FileResponse(
+        path,
+        media_type=media_type,
+        filename=f"{job['collection']}-{job['created_at']:%Y%m%d-%H%M%S}.{job['format']}"
+    )
+
+@router.delete("/exports/{job_id}")
+async def delete_export(
+    job_id: str,
+    current_user: dict = Depends(require_role(UserRole.EDITOR))
+):
+    job = await _get_own_export(job_id, current_user)
+    _export_path(job_id, job["format"]).unlink(missing_ok=True)
+    await db.export_jobs.delete_one({"id": job_id})
+    return {"message": "Export deleted successfully"}
@@ -0,0 +1,67 @@
+from functools import lru_cache
+from typing import Optional, Tuple, get_type_hints
+from fastapi import HTTPException, status
+from pydantic import create_model
+
+from conditional import validator_headers
+from serialization import FastJSONResponse
+
+# Named `fields=` presets per public resource; "full" (or no parameter) means every field
+FIELD_PRESETS = {
+    "programs": {
+        "card": ("title", "category", "duration", "image")
+    },
+    "events": {
+        "card": ("title", "date", "type", "status", "image")
+    },
+    "success_stories": {
+        "card": ("name", "company", "achievement", "image")
+    }
+}
+
+# Always selected: id identifies the item and updated_at feeds the ETag
+REQUIRED_FIELDS = ("id", "updated_at")
+
+def select_fields(resource: str, model, fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """Turn a `fields=` value (preset name or comma-separated names) into a field tuple.
+
+    Returns None when the full document is wanted.
+    """
+    if not fields or fields == "full":
+        return None
+
+    requested = FIELD_PRESETS[resource].get(fields)
+    if requested is None:
+        requested = tuple(name.strip() for name in fields.split(",") if name.strip())
+        unknown = [name for name in requested if name not in model.__fields__]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(unknown)}"
+            )
+    # Keep model order so equal selections share one cache entry and model
+    selected = set(requested) | set(REQUIRED_FIELDS)
+    return tuple(name for name in model.__fields__ if name in selected)
+
+def fieldset_projection(selected: Optional[Tuple[str, ...]]) -> Optional[dict]:
+    if selected is None:
+        return None
+    return {"_id": 0, **{name: 1 for name in selected}}
+
+@lru_cache(maxsize=64)
+def fieldset_model(model, selected: Optional[Tuple[str, ...]]):
+    """Response model holding only the selected fields of `model`."""
+    if selected is None:
+        return model
+    hints = get_type_hints(model)
+    return create_model(
+        f"{model.__name__}Fields",
+        **{
+            name: (hints[name], ... if model.__fields__[name].required else model.__fields__[name].default)
+            for name in selected
+        }
+    )
+
+def fieldset_response(item: dict, etag: str, last_modified) -> FastJSONResponse:
+    # Trimmed items would not pass the route's full response_model
+    return FastJSONResponse(content=item, headers=validator_headers(etag, last_modified))
@@ -0,0 +1,183 @@
+import asyncio
+import base64
+import json
+import logging
+import re
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+from google.auth import jwt as google_jwt
+from google.auth.transport import requests as google_requests
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_CERTS_URL = "https://www.googleapis.com/oauth2/v1/certs"
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+def parse_max_age(cache_control: Optional[str]) -> Optional[int]:
+    if not cache_control:
+        return None
+    match = _MAX_AGE_RE.search(cache_control)
+    return int(match.group(1)) if match else None
+
+class CertSource:
+    """Where signing certificates come from.
+
+    `fetch` returns a mapping of key id to PEM certificate together with the
+    number of seconds the set may be cached for (None when unspecified).
+    """
+
+    async def fetch(self) -> Tuple[Dict[str, str], Optional[int]]:
+        raise NotImplementedError
+
+class HttpCertSource(CertSource):
+    """Fetches PEM certificates from Google, or from any issuer serving the same format."""
+
+    def __init__(self, url: str = GOOGLE_CERTS_URL):
+        self.url = url
+        self._request = google_requests.Request()
+
+    def _fetch_sync(self) -> Tuple[Dict[str, str], Optional[int]]:
+        response = self._request(url=self.url, method="GET")
+        if response.status != 200:
+            raise ValueError(f"Could not fetch certificates from {self.url}: HTTP {response.status}")
+        certs = json.loads(response.data.decode("utf-8"))
+        return certs, parse_max_age(response.headers.get("cache-control"))
+
+    async def fetch(self) -> Tuple[Dict[str, str], Optional[int]]:
+        return await asyncio.to_thread(self._fetch_sync)
+
+class StaticCertSource(CertSource):
+    """Fixed certificate set, for a local stand-in issuer."""
+
+    def __init__(self, certs: Dict[str, str], max_age: Optional[int] = None):
+        self.certs = certs
+        self.max_age = max_age
+
+    async def fetch(self) -> Tuple[Dict[str, str], Optional[int]]:
+        return dict(self.certs), self.max_age
+
+def _unverified_key_id(token: str) -> Optional[str]:
+    header_segment = token.split(".", 1)[0]
+    padded = header_segment + "=" * (-len(header_segment) % 4)
+    try:
+        header = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        raise ValueError("Malformed ID token")
+    return header.get("kid")
+
+class GoogleIdTokenVerifier:
+    """Verifies Google ID tokens locally against a cached certificate set.
+
+    Certificates are kept for the Cache-Control max-age of the last fetch and
+    refreshed ahead of expiry by a background task. An unknown key id forces
+    an early refresh, at most once per `min_refresh_interval` seconds. If a
+    refresh fails the previous set keeps being used until one succeeds.
+    """
+
+    def __init__(
+        self,
+        source: CertSource,
+        audience: Optional[str],
+        issuers: Iterable[str] = GOOGLE_ISSUERS,
+        default_max_age: int = 3600,
+        refresh_margin: int = 300,
+        min_refresh_interval: int = 30,
+        clock_skew_seconds: int = 10
+    ):
+        self.source = source
+        self.audience = audience
+        self.issuers = tuple(issuers)
+        self.default_max_age = default_max_age
+        self.refresh_margin = refresh_margin
+        self.min_refresh_interval = min_refresh_interval
+        self.clock_skew_seconds = clock_skew_seconds
+        self._certs: Dict[str, str] = {}
+        self._expires_at = 0.0
+        self._last_fetch = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self.fetches = 0
+        self.fetch_failures = 0
+
+    async def refresh(self, force: bool = False) -> None:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            now = time.monotonic()
+            # Another caller may have refreshed while we waited for the lock
+            if not force and self._certs and now < self._expires_at - self.refresh_margin:
+                return
+            if force and now - self._last_fetch < self.min_refresh_interval:
+                return
+            self._last_fetch = now
+            try:
+                certs, max_age = await self.source.fetch()
+            except Exception:
+                self.fetch_failures += 1
+                if not self._certs:
+                    raise
+                logger.warning("Certificate refresh failed, keeping previous set", exc_info=True)
+                return
+            self.fetches += 1
+            self._certs = certs
+            self._expires_at = now + (max_age if max_age is not None else self.default_max_age)
+
+    async def get_certs(self) -> Dict[str, str]:
+        if not self._certs or time.monotonic() >= self._expires_at:
+            await self.refresh()
+        return self._certs
+
+    async def verify(self, token: str) -> dict:
+        if not self.audience:
+            raise ValueError("GOOGLE_CLIENT_ID is not configured")
+        key_id = _unverified_key_id(token)
+        certs = await self.get_certs()
+        if key_id and key_id not in certs:
+            await self.refresh(force=True)
+            certs = self._certs
+
+        # Signature, expiry and audience are all checked locally
+        claims = google_jwt.decode(
+            token,
+            certs=certs,
+            audience=self.audience,
+            clock_skew_in_seconds=self.clock_skew_seconds
+        )
+        if claims.get("iss") not in self.issuers:
+            raise ValueError(f"Wrong issuer: {claims.get('iss')}")
+        return claims
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+                delay = self._expires_at - time.monotonic() - self.refresh_margin
+            except Exception:
+                logger.warning("Background certificate refresh failed", exc_info=True)
+                delay = self.min_refresh_interval
+            await asyncio.sleep(max(delay, self.min_refresh_interval))
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "keys": len(self._certs),
+            "expires_in_seconds": max(round(self._expires_at - time.monotonic()), 0),
+            "fetches": self.fetches,
+            "fetch_failures": self.fetch_failures,
+            "background_refresh": self._task is not None
+        }
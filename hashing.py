@@ -0,0 +1,87 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Optional
+import bcrypt
+
+class PoolSaturated(Exception):
+    """Raised when a job arrives while every worker is busy and the queue is full."""
+
+def bcrypt_hash(password: str) -> str:
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+
+def bcrypt_check(password: str, hashed: str) -> bool:
+    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+
+class BoundedExecutor:
+    """Runs blocking CPU work off the event loop with a hard cap on backlog.
+
+    At most `max_workers` jobs run at once and at most `max_queue` more may
+    wait for a slot; anything beyond that fails immediately with
+    `PoolSaturated` instead of queueing behind a login burst.
+    """
+
+    def __init__(self, max_workers: int = 4, max_queue: int = 32, use_processes: bool = False):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.use_processes = use_processes
+        self._executor: Optional[Executor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._active = 0
+        self._waiting = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.use_processes:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="bcrypt"
+                )
+        return self._executor
+
+    async def run(self, fn: Callable, *args):
+        if self._active + self._waiting >= self.max_workers + self.max_queue:
+            self.rejected += 1
+            raise PoolSaturated()
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+
+        self._waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+
+        self._active += 1
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._get_executor(), fn, *args)
+            self.completed += 1
+            return result
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self._active -= 1
+            self._slots.release()
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            "mode": "process" if self.use_processes else "thread",
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "active": self._active,
+            "queued": self._waiting,
+            "utilisation": round(self._active / self.max_workers, 4) if self.max_workers else 0.0,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected
+        }
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+
+import argparse
+import asyncio
+import os
+from motor.motor_asyncio import AsyncIOMotorClient
+from dotenv import load_dotenv
+from pathlib import Path
+
+from importer import import_records, file_chunks, IMPORT_SOURCES, IMPORT_BATCH_SIZE
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+EXTENSION_FORMATS = {".csv": "csv", ".json": "json", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+
+async def main(args):
+    file_format = args.format or EXTENSION_FORMATS.get(Path(args.file).suffix.lower())
+    if not file_format:
+        print("Cannot tell the file format from its extension, pass --format")
+        return
+
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+    try:
+        created_by = args.created_by
+        if not created_by:
+            owner = await db.users.find_one({"role": "OWNER"}, {"_id": 0, "id": 1}, sort=[("created_at", 1)])
+            created_by = owner["id"] if owner else "import"
+
+        create_model, model = IMPORT_SOURCES[args.kind]
+        report = await import_records(
+            db, args.kind, file_chunks(args.file), file_format, create_model, model,
+            created_by=created_by, batch_size=args.batch_size
+        )
+        print(f"Imported {report['inserted']} of {report['received']} {args.kind} rows, {report['failed']} failed")
+        for error in report["errors"]:
+            print(f"  Row {error['row']}: {error['error']}")
+        if report["errors_truncated"]:
+            print(f"  ... {report['failed'] - len(report['errors'])} more errors not shown")
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import programs, events or success stories")
+    parser.add_argument("kind", choices=sorted(IMPORT_SOURCES))
+    parser.add_argument("file")
+    parser.add_argument("--format", choices=["csv", "json", "ndjson"])
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    parser.add_argument("--created-by", help="User id recorded as created_by (defaults to the first owner)")
+    asyncio.run(main(parser.parse_args()))
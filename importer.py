@@ -0,0 +1,271 @@
+import asyncio
+import codecs
+import csv
+import io
+import json
+from typing import AsyncIterator, List, Tuple
+from pydantic import ValidationError
+from pydantic.fields import SHAPE_SINGLETON
+from pymongo.errors import BulkWriteError
+
+from bulk import merge_changes
+from catalogue import ProgramCreate, Program, EventCreate, Event, SuccessStoryCreate, SuccessStory
+from counters import bump_counters, program_activated
+from rollups import record_rollup, program_created
+
+IMPORT_BATCH_SIZE = 500
+READ_CHUNK_SIZE = 64 * 1024
+# A single JSON array element or CSV record may not grow the buffer past this
+MAX_RECORD_BYTES = 1024 * 1024
+# The report keeps the first errors only, so a bad file can't grow it unbounded
+MAX_REPORTED_ERRORS = 1000
+
+# Per importable collection: the create payload rows are validated against and the stored model
+IMPORT_SOURCES = {
+    "programs": (ProgramCreate, Program),
+    "events": (EventCreate, Event),
+    "success_stories": (SuccessStoryCreate, SuccessStory)
+}
+
+# Per importable collection: counter and rollup changes for a batch of inserted documents
+IMPORT_KINDS = {
+    "programs": {
+        "counters": lambda docs: merge_changes(program_activated(doc["category"]) for doc in docs if doc["is_active"]),
+        "rollups": lambda docs: merge_changes(program_created(doc["category"]) for doc in docs)
+    },
+    "events": {
+        "counters": lambda docs: {"events.total": len(docs)},
+        "rollups": lambda docs: {}
+    },
+    "success_stories": {
+        "counters": lambda docs: {"success_stories.published": sum(1 for doc in docs if doc["is_published"])},
+        "rollups": lambda docs: {}
+    }
+}
+
+class RecordError(Exception):
+    pass
+
+async def file_chunks(path, chunk_size: int = READ_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    with open(path, "rb") as handle:
+        while True:
+            chunk = await asyncio.to_thread(handle.read, chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+async def _text(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    async for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    pending = ""
+    async for text in _text(chunks):
+        pending += text
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line
+        if len(pending) > MAX_RECORD_BYTES:
+            raise RecordError("Line too long")
+    if pending:
+        yield pending
+
+async def _ndjson_records(chunks):
+    row = 0
+    async for line in _lines(chunks):
+        if not line.strip():
+            continue
+        row += 1
+        try:
+            yield row, json.loads(line)
+        except ValueError as e:
+            yield row, RecordError(f"Invalid JSON: {e}")
+
+async def _csv_records(chunks):
+    header = None
+    row = 0
+    record = ""
+    async for line in _lines(chunks):
+        record = f"{record}\n{line}" if record else line
+        # A quoted field may span lines; the record is complete once quotes balance
+        if record.count('"') % 2:
+            if len(record) > MAX_RECORD_BYTES:
+                raise RecordError("Unterminated quoted field")
+            continue
+        text, record = record.rstrip("\r"), ""
+        if not text.strip():
+            continue
+        values = next(csv.reader(io.StringIO(text)))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        row += 1
+        if len(values) != len(header):
+            yield row, RecordError(f"Expected {len(header)} columns, got {len(values)}")
+        else:
+            yield row, dict(zip(header, values))
+    if record:
+        yield row + 1, RecordError("Unterminated quoted field")
+
+async def _json_records(chunks):
+    """Stream the elements of a top-level JSON array without loading the whole file."""
+    decoder = json.JSONDecoder()
+    text_chunks = _text(chunks)
+    buffer, position = "", 0
+    started, exhausted = False, False
+    row = 0
+
+    while True:
+        while position < len(buffer) and buffer[position] in (" \t\r\n," if started else " \t\r\n"):
+            position += 1
+
+        if position < len(buffer):
+            if not started:
+                if buffer[position] != "[":
+                    raise RecordError("Expected a JSON array")
+                position, started = position + 1, True
+                continue
+            if buffer[position] == "]":
+                return
+            try:
+                value, end = decoder.raw_decode(buffer, position)
+            except ValueError:
+                end = None
+            # Only trust a decode that stops short of the buffer end; a number
+            # or a truncated object at the very end may continue in the next chunk
+            if end is not None and (end < len(buffer) or exhausted):
+                row += 1
+                yield row, value
+                position = end
+                continue
+            if exhausted:
+                yield row + 1, RecordError("Invalid JSON")
+                return
+
+        if exhausted:
+            if started:
+                yield row + 1, RecordError("Unterminated JSON array")
+            return
+        if len(buffer) - position > MAX_RECORD_BYTES:
+            raise RecordError("Record too large")
+        try:
+            buffer, position = buffer[position:] + await text_chunks.__anext__(), 0
+        except StopAsyncIteration:
+            exhausted = True
+
+RECORD_READERS = {
+    "csv": _csv_records,
+    "json": _json_records,
+    "ndjson": _ndjson_records
+}
+
+def _from_csv(create_model, record: dict) -> dict:
+    # Empty cells fall back to the model defaults; list fields are "|"-separated
+    values = {}
+    for key, value in record.items():
+        if value == "":
+            continue
+        field = create_model.__fields__.get(key)
+        if field is not None and field.shape != SHAPE_SINGLETON:
+            value = [item.strip() for item in value.split("|") if item.strip()]
+        values[key] = value
+    return values
+
+def _describe(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in entry['loc'])}: {entry['msg']}"
+        for entry in error.errors()
+    )
+
+class ImportReport:
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.received = 0
+        self.inserted = 0
+        self.failed = 0
+        self.errors: List[dict] = []
+
+    def fail(self, row: int, message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "error": message})
+
+    def dict(self) -> dict:
+        return {
+            "kind": self.kind,
+            "received": self.received,
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors)
+        }
+
+async def _flush(db, kind: str, batch: List[Tuple[int, dict]], report: ImportReport) -> None:
+    if not batch:
+        return
+    docs = [doc for _, doc in batch]
+    failed_indexes = set()
+    try:
+        await db[kind].insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        for write_error in e.details.get("writeErrors", []):
+            failed_indexes.add(write_error["index"])
+            report.fail(batch[write_error["index"]][0], write_error.get("errmsg", "Write failed"))
+
+    inserted = [doc for index, doc in enumerate(docs) if index not in failed_indexes]
+    report.inserted += len(inserted)
+    await bump_counters(db, IMPORT_KINDS[kind]["counters"](inserted))
+    await record_rollup(db, IMPORT_KINDS[kind]["rollups"](inserted))
+
+async def import_records(
+    db,
+    kind: str,
+    chunks: AsyncIterator[bytes],
+    file_format: str,
+    create_model,
+    model,
+    created_by: str,
+    batch_size: int = IMPORT_BATCH_SIZE
+) -> dict:
+    """Validate streamed rows against `create_model` and insert them in batches.
+
+    At most one batch of documents is held at a time. Rows that fail
+    validation or insertion are recorded in the report by their 1-based
+    record number and do not stop the import.
+    """
+    report = ImportReport(kind)
+    batch: List[Tuple[int, dict]] = []
+
+    try:
+        async for row, record in RECORD_READERS[file_format](chunks):
+            report.received += 1
+            if isinstance(record, RecordError):
+                report.fail(row, str(record))
+                continue
+            if not isinstance(record, dict):
+                report.fail(row, "Expected an object")
+                continue
+            if file_format == "csv":
+                record = _from_csv(create_model, record)
+            try:
+                item = model(**create_model(**record).dict(), created_by=created_by)
+            except ValidationError as e:
+                report.fail(row, _describe(e))
+                continue
+
+            batch.append((row, item.dict()))
+            if len(batch) >= batch_size:
+                await _flush(db, kind, batch, report)
+                batch = []
+    except RecordError as e:
+        # The stream itself is unreadable past this point
+        report.fail(report.received + 1, str(e))
+
+    await _flush(db, kind, batch, report)
+    return report.dict()
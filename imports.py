@@ -0,0 +1,47 @@
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request
+from typing import Optional
+from ..server import (
+    db, ImportFormat, UserRole, require_role, catalogue_cache
+)
+from ..importer import import_records, IMPORT_SOURCES, IMPORT_BATCH_SIZE
+
+router = APIRouter(prefix="/api/admin", tags=["Admin - Imports"])
+
+CONTENT_TYPE_FORMATS = {
+    "text/csv": ImportFormat.CSV,
+    "application/json": ImportFormat.JSON,
+    "application/x-ndjson": ImportFormat.NDJSON
+}
+
+@router.post("/imports/{kind}")
+async def import_catalogue(
+    kind: str,
+    request: Request,
+    format: Optional[ImportFormat] = None,
+    batch_size: int = Query(IMPORT_BATCH_SIZE, ge=1, le=5000),
+    current_user: dict = Depends(require_role(UserRole.EDITOR))
+):
+    if kind not in IMPORT_SOURCES:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Unknown import collection"
+        )
+    
+    if format is None:
+        content_type = request.headers.get("content-type", "").split(";")[0].strip()
+        format = CONTENT_TYPE_FORMATS.get(content_type)
+        if format is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Pass format=csv|json|ndjson or a matching Content-Type"
+            )
+    
+    # The body is read chunk by chunk, never as a whole
+    create_model, model = IMPORT_SOURCES[kind]
+    report = await import_records(
+        db, kind, request.stream(), format.value, create_model, model,
+        created_by=current_user["id"], batch_size=batch_size
+    )
+    if report["inserted"]:
+        catalogue_cache.invalidate(kind)
+    return report
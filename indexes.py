@@ -0,0 +1,245 @@
+import logging
+from typing import Dict, List, Optional
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+# Declarative index registry. Every index the API relies on is listed here by
+# name; reconcile_indexes() makes the database match it.
+INDEXES: Dict[str, List[dict]] = {
+    "users": [
+        {"name": "id_unique", "keys": [("id", 1)], "unique": True},
+        {"name": "email_unique", "keys": [("email", 1)], "unique": True},
+        {"name": "created", "keys": [("created_at", -1), ("id", -1)]},
+        {"name": "role_created", "keys": [("role", 1), ("created_at", -1), ("id", -1)]},
+        {"name": "active_created", "keys": [("is_active", 1), ("created_at", -1), ("id", -1)]},
+    ],
+    "programs": [
+        {"name": "id_unique", "keys": [("id", 1)], "unique": True},
+        {"name": "active_category", "keys": [("is_active", 1), ("category", 1)]},
+        {"name": "created", "keys": [("created_at", -1), ("id", -1)]},
+        # GET /api/search; Mongo allows one text index per collection
+        {
+            "name": "text_search",
+            "keys": [("title", "text"), ("features", "text"), ("description", "text")],
+            "weights": {"title": 10, "features": 5, "description": 1},
+        },
+    ],
+    "events": [
+        {"name": "id_unique", "keys": [("id", 1)], "unique": True},
+        {"name": "status_created", "keys": [("status", 1), ("created_at", -1), ("id", -1)]},
+        {"name": "created", "keys": [("created_at", -1), ("id", -1)]},
+        {
+            "name": "text_search",
+            "keys": [("title", "text"), ("type", "text"), ("description", "text")],
+            "weights": {"title": 10, "type": 5, "description": 1},
+        },
+    ],
+    "applications": [
+        {"name": "id_unique", "keys": [("id", 1)], "unique": True},
+        # One application per user per program/event; the partial filter keeps
+        # the null side of the pair out of the unique constraint
+        {
+            "name": "user_program_unique",
+            "keys": [("user_id", 1), ("program_id", 1)],
+            "unique": True,
+            "partialFilterExpression": {"program_id": {"$type": "string"}},
+        },
+        {
+            "name": "user_event_unique",
+            "keys": [("user_id", 1), ("event_id", 1)],
+            "unique": True,
+            "partialFilterExpression": {"event_id": {"$type": "string"}},
+        },
+        # The partial indexes above can't serve a bare user_id filter (My applications)
+        {"name": "user_created", "keys": [("user_id", 1), ("created_at", -1), ("id", -1)]},
+        # Keyset pagination walks (created_at, id) newest first
+        {"name": "status_created", "keys": [("status", 1), ("created_at", -1), ("id", -1)]},
+        {"name": "type_created", "keys": [("type", 1), ("created_at", -1), ("id", -1)]},
+        {"name": "created", "keys": [("created_at", -1), ("id", -1)]},
+        # q= prefix lookups over the normalized keys from lookup.py
+        {"name": "search_keys_created", "keys": [("search_keys", 1), ("created_at", -1), ("id", -1)]},
+    ],
+    "contacts": [
+        {"name": "id_unique", "keys": [("id", 1)], "unique": True},
+        {"name": "status_created", "keys": [("status", 1), ("created_at", -1), ("id", -1)]},
+        {"name": "created", "keys": [("created_at", -1), ("id", -1)]},
+        {"name": "search_keys_created", "keys": [("search_keys", 1), ("created_at", -1), ("id", -1)]},
+    ],
+    "success_stories": [
+        {"name": "id_unique", "keys": [("id", 1)], "unique": True},
+        {"name": "published_created", "keys": [("is_published", 1), ("created_at", -1), ("id", -1)]},
+        {"name": "created", "keys": [("created_at", -1), ("id", -1)]},
+        {
+            "name": "text_search",
+            "keys": [("name", "text"), ("company", "text"), ("achievement", "text"), ("story", "text")],
+            "weights": {"name": 10, "company": 5, "achievement": 5, "story": 1},
+        },
+    ],
+    "waitlist": [
+        {"name": "queue_seq_unique", "keys": [("target_type", 1), ("target_id", 1), ("seq", 1)], "unique": True},
+        {"name": "application_unique", "keys": [("application_id", 1)], "unique": True},
+    ],
+    "outbox": [
+        {"name": "id_unique", "keys": [("id", 1)], "unique": True},
+        # Worker claims: due PENDING messages and SENDING ones whose lease ran out
+        {"name": "status_due", "keys": [("status", 1), ("next_attempt_at", 1)]},
+    ],
+    "export_jobs": [
+        {"name": "id_unique", "keys": [("id", 1)], "unique": True},
+        {"name": "requester_created", "keys": [("requested_by", 1), ("created_at", -1)]},
+        # Sweep for jobs whose worker stopped renewing the lease
+        {"name": "status_lease", "keys": [("status", 1), ("lease_expires_at", 1)]},
+    ],
+}
+
+# Representative shapes of the queries issued by the routes, used by
+# check_route_queries() to spot collection scans.
+ROUTE_QUERIES: List[dict] = [
+    {"route": "get_current_user", "collection": "users", "filter": {"id": "x"}},
+    {"route": "login_user", "collection": "users", "filter": {"email": "x@example.com"}},
+    {"route": "get_programs", "collection": "programs", "filter": {"is_active": True}},
+    {"route": "get_program", "collection": "programs", "filter": {"id": "x", "is_active": True}},
+    {"route": "get_event", "collection": "events", "filter": {"id": "x"}},
+    {"route": "get_events", "collection": "events", "filter": {"status": "upcoming"}},
+    {"route": "get_my_applications", "collection": "applications", "filter": {"user_id": "x"}},
+    {"route": "submit_application", "collection": "applications", "filter": {"user_id": "x", "program_id": "x"}},
+    {"route": "submit_application", "collection": "applications", "filter": {"user_id": "x", "event_id": "x"}},
+    {
+        "route": "get_all_applications",
+        "collection": "applications",
+        "filter": {"status": "PENDING"},
+        "sort": [("created_at", -1), ("id", -1)],
+    },
+    {
+        "route": "get_all_contacts",
+        "collection": "contacts",
+        "filter": {"status": "UNREAD"},
+        "sort": [("created_at", -1), ("id", -1)],
+    },
+    # q= lookups page in search_keys_created order instead of sorting the matches
+    {
+        "route": "get_all_applications",
+        "collection": "applications",
+        "filter": {"search_keys": {"$regex": "^jane"}},
+        "hint": "search_keys_created",
+        "limit": 50,
+    },
+    {
+        "route": "get_all_contacts",
+        "collection": "contacts",
+        "filter": {"search_keys": {"$regex": "^jane"}},
+        "hint": "search_keys_created",
+        "limit": 50,
+    },
+    {"route": "get_waitlist_position", "collection": "waitlist", "filter": {"application_id": "x", "user_id": "x"}},
+    {"route": "get_success_stories", "collection": "success_stories", "filter": {"is_published": True}},
+    {"route": "get_success_story", "collection": "success_stories", "filter": {"id": "x", "is_published": True}},
+    {"route": "search", "collection": "programs", "filter": {"$text": {"$search": "x"}, "is_active": True}},
+    {"route": "search", "collection": "events", "filter": {"$text": {"$search": "x"}}},
+    {"route": "search", "collection": "success_stories", "filter": {"$text": {"$search": "x"}, "is_published": True}},
+]
+
+_INDEX_OPTIONS = ("unique", "sparse", "partialFilterExpression", "expireAfterSeconds", "weights")
+
+def _normalize_keys(keys) -> list:
+    return [(field, int(direction) if isinstance(direction, (int, float)) else direction)
+            for field, direction in keys]
+
+def _text_keys(spec: dict) -> list:
+    # Live text indexes report their keys as ("_fts", "text"), ("_ftsx", 1)
+    # and list the actual fields under weights only
+    if any(field == "_fts" for field, _ in spec["keys"]):
+        return sorted((field, "text") for field in spec.get("weights", {}))
+    return sorted((field, direction) for field, direction in spec["keys"] if direction == "text")
+
+def _describe(spec: dict) -> dict:
+    keys = _normalize_keys(spec["keys"])
+    if any(direction == "text" for _, direction in keys):
+        keys = _text_keys(spec)
+    return {
+        "keys": keys,
+        **{option: spec[option] for option in _INDEX_OPTIONS if spec.get(option) is not None},
+    }
+
+async def reconcile_indexes(db, apply: bool = True, drop_unknown: bool = False) -> dict:
+    """Compare live indexes against INDEXES and optionally fix the difference.
+
+    Returns a per-collection report of created, changed (dropped and rebuilt),
+    unknown and already up-to-date indexes. With apply=False nothing is
+    written and the report only describes the drift.
+    """
+    report = {}
+    for collection_name, specs in INDEXES.items():
+        collection = db[collection_name]
+        live = await collection.index_information()
+        entry = {"created": [], "changed": [], "conflicts": [], "unknown": [], "ok": []}
+
+        for spec in specs:
+            wanted = _describe(spec)
+            existing = live.get(spec["name"])
+            if existing is not None:
+                current = _describe({**existing, "keys": existing["key"]})
+                if current == wanted:
+                    entry["ok"].append(spec["name"])
+                    continue
+                entry["changed"].append(spec["name"])
+                if apply:
+                    await collection.drop_index(spec["name"])
+            else:
+                entry["created"].append(spec["name"])
+            if apply:
+                options = {option: spec[option] for option in _INDEX_OPTIONS if option in spec}
+                try:
+                    await collection.create_index(spec["keys"], name=spec["name"], **options)
+                except OperationFailure as e:
+                    # Usually the same keys already indexed under another name
+                    entry["conflicts"].append({"name": spec["name"], "error": str(e)})
+
+        known = {spec["name"] for spec in specs} | {"_id_"}
+        for name in live:
+            if name not in known:
+                entry["unknown"].append(name)
+                if apply and drop_unknown:
+                    await collection.drop_index(name)
+
+        if entry["created"] or entry["changed"] or entry["conflicts"] or entry["unknown"]:
+            logger.info("Index drift on %s: %s", collection_name, entry)
+        report[collection_name] = entry
+    return report
+
+def _plan_stages(plan) -> List[str]:
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(_plan_stages(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(_plan_stages(item))
+    return stages
+
+async def check_route_queries(db, queries: Optional[List[dict]] = None) -> List[dict]:
+    """Run explain() for each route query and flag collection scans and in-memory sorts."""
+    results = []
+    for query in queries or ROUTE_QUERIES:
+        cursor = db[query["collection"]].find(query["filter"])
+        if query.get("sort"):
+            cursor = cursor.sort(query["sort"])
+        if query.get("hint"):
+            cursor = cursor.hint(query["hint"])
+        if query.get("limit"):
+            cursor = cursor.limit(query["limit"])
+        explain = await cursor.explain()
+        winning_plan = explain.get("queryPlanner", {}).get("winningPlan", {})
+        stages = _plan_stages(winning_plan)
+        results.append({
+            "route": query["route"],
+            "collection": query["collection"],
+            "filter": query["filter"],
+            "stages": stages,
+            "uses_index": "COLLSCAN" not in stages,
+            "in_memory_sort": "SORT" in stages,
+        })
+    return results
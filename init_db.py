@@ -1,14 +1,22 @@
-"#!/usr/bin/env python3
+#!/usr/bin/env python3
 
 import asyncio
 import os
+import sys
 from motor.motor_asyncio import AsyncIOMotorClient
-from datetime import datetime
+from datetime import datetime, timedelta
 import uuid
 import bcrypt
 from dotenv import load_dotenv
 from pathlib import Path
 
+from indexes import reconcile_indexes, check_route_queries
+from counters import rebuild_counters
+from rollups import backfill_rollups
+from registration import recount_seats
+from lookup import backfill_search_keys
+from outbox import requeue_dead
+
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
@@ -20,39 +28,76 @@ def hash_password(password: str) -> str:
     return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
 
 async def main():
-    print(\"Initializing database...\")
+    print("Initializing database...")
     
     try:
-        await db.command(\"ping\")
-        print(\"Database connected successfully\")
+        await db.command("ping")
+        print("Database connected successfully")
         
         # Create admin user
-        existing_admin = await db.users.find_one({\"email\": \"admin@rsinnovationhub.com\"})
+        existing_admin = await db.users.find_one({"email": "admin@rsinnovationhub.com"})
         if not existing_admin:
             admin_user = {
-                \"id\": str(uuid.uuid4()),
-                \"name\": \"Admin User\",
-                \"email\": \"admin@rsinnovationhub.com\", 
-                \"password\": hash_password(\"admin123\"),
-                \"role\": \"OWNER\",
-                \"profile_picture\": None,
-                \"phone\": \"+91 98765 43210\",
-                \"google_id\": None,
-                \"is_active\": True,
-                \"created_at\": datetime.utcnow(),
-                \"updated_at\": datetime.utcnow()
+                "id": str(uuid.uuid4()),
+                "name": "Admin User",
+                "email": "admin@rsinnovationhub.com", 
+                "password": hash_password("admin123"),
+                "role": "OWNER",
+                "profile_picture": None,
+                "phone": "+91 98765 43210",
+                "google_id": None,
+                "is_active": True,
+                "created_at": datetime.utcnow(),
+                "updated_at": datetime.utcnow()
             }
             await db.users.insert_one(admin_user)
-            print(\"Admin user created: admin@rsinnovationhub.com / admin123\")
+            print("Admin user created: admin@rsinnovationhub.com / admin123")
         else:
-            print(\"Admin user already exists\")
+            print("Admin user already exists")
+        
+        # Bring indexes in line with the registry in indexes.py
+        report = await reconcile_indexes(db, drop_unknown="--drop-unknown-indexes" in sys.argv)
+        for collection_name, entry in report.items():
+            print(f"Indexes on {collection_name}: "
+                  f"{len(entry['ok'])} ok, created {entry['created']}, "
+                  f"rebuilt {entry['changed']}, unknown {entry['unknown']}")
+            for conflict in entry["conflicts"]:
+                print(f"  Conflict on {conflict['name']}: {conflict['error']}")
+        
+        if "--rebuild-counters" in sys.argv:
+            counters = await rebuild_counters(db)
+            print(f"Dashboard counters rebuilt: {counters}")
+            seats = await recount_seats(db)
+            print(f"Seat counters recounted: {seats}")
+        
+        if "--backfill-rollups" in sys.argv:
+            # Optional day count after the flag, one year by default
+            position = sys.argv.index("--backfill-rollups")
+            days = int(sys.argv[position + 1]) if len(sys.argv) > position + 1 and sys.argv[position + 1].isdigit() else 365
+            today = datetime.utcnow().date()
+            written = await backfill_rollups(db, today - timedelta(days=days), today)
+            print(f"Backfilled {written} daily rollup buckets")
+        
+        if "--backfill-search-keys" in sys.argv:
+            # Add --force-search-keys to rewrite keys that already exist
+            written = await backfill_search_keys(db, force="--force-search-keys" in sys.argv)
+            print(f"Search keys written: {written}")
+        
+        if "--requeue-dead-mail" in sys.argv:
+            requeued = await requeue_dead(db)
+            print(f"Requeued {requeued} dead outbox messages")
+        
+        if "--check-queries" in sys.argv:
+            for result in await check_route_queries(db):
+                flag = "COLLSCAN" if not result["uses_index"] else "SORT" if result["in_memory_sort"] else "ok"
+                print(f"[{flag}] {result['route']} on {result['collection']}: {' > '.join(result['stages'])}")
             
-        print(\"Database initialization complete!\")
+        print("Database initialization complete!")
         
     except Exception as e:
-        print(f\"Error: {e}\")
+        print(f"Error: {e}")
     finally:
         client.close()
 
-if __name__ == \"__main__\":
-    asyncio.run(main())"
\ No newline at end of file
+if __name__ == "__main__":
+    asyncio.run(main())
\ No newline at end of file
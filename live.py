@@ -0,0 +1,75 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from typing import Callable, Optional
+from ..server import live_hub, require_role, UserRole, TRUST_FORWARDED_FOR
+from ..broadcast import DASHBOARD_TOPIC, REGISTRATIONS_TOPIC, SubscriberLimit, sse_message
+from ..admission import client_ip
+
+router = APIRouter(prefix="/api", tags=["Live Updates"])
+
+# A comment line this often lets proxies and the server notice dead connections
+HEARTBEAT_SECONDS = 15
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+LIMIT_RETRY_AFTER_SECONDS = 30
+
+async def _stream(
+    request: Request,
+    topic: str,
+    select: Optional[Callable[[dict], Optional[dict]]] = None,
+    client: Optional[str] = None
+):
+    try:
+        async with live_hub.subscribe(topic, client) as subscriber:
+            yield "retry: 5000\n\n"
+            while not await request.is_disconnected():
+                message = await subscriber.next(HEARTBEAT_SECONDS)
+                if message is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                if select is not None and message["event"] == topic:
+                    message = select(message)
+                    if message is None:
+                        continue
+                yield sse_message(message)
+    except SubscriberLimit:
+        # Lost the race for the last slot after the check below; reconnect later
+        yield f"retry: {LIMIT_RETRY_AFTER_SECONDS * 1000}\n\n"
+
+def _split_ids(value: Optional[str]) -> set:
+    return {item.strip() for item in value.split(",") if item.strip()} if value else set()
+
+# Admin stream - current dashboard counters with their version, newer than GET /api/admin/dashboard when version is higher
+@router.get("/admin/live/dashboard")
+async def stream_dashboard(
+    request: Request,
+    current_user: dict = Depends(require_role(UserRole.EDITOR))
+):
+    return StreamingResponse(_stream(request, DASHBOARD_TOPIC), media_type="text/event-stream", headers=SSE_HEADERS)
+
+# Public stream - current seat and waitlist numbers of events/programs as they change
+@router.get("/live/registrations")
+async def stream_registrations(
+    request: Request,
+    event_ids: Optional[str] = None,
+    program_ids: Optional[str] = None
+):
+    client = client_ip(request.scope, TRUST_FORWARDED_FOR)
+    if not live_hub.can_subscribe(REGISTRATIONS_TOPIC, client):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many live connections, retry later",
+            headers={"Retry-After": str(LIMIT_RETRY_AFTER_SECONDS)}
+        )
+    
+    wanted = {"events": _split_ids(event_ids), "programs": _split_ids(program_ids)}
+    select = None
+    if wanted["events"] or wanted["programs"]:
+        def select(message: dict) -> Optional[dict]:
+            data = {
+                collection: {target_id: counts for target_id, counts in targets.items() if target_id in wanted[collection]}
+                for collection, targets in message["data"].items()
+            }
+            data = {collection: targets for collection, targets in data.items() if targets}
+            return {**message, "data": data} if data else None
+    
+    return StreamingResponse(_stream(request, REGISTRATIONS_TOPIC, select, client), media_type="text/event-stream", headers=SSE_HEADERS)
@@ -0,0 +1,128 @@
+import re
+import unicodedata
+from typing import Iterable, List, Optional
+from fastapi import HTTPException, status
+from pymongo import UpdateOne
+
+# Admin consoles look applicants up by name, email or phone. Each application
+# and contact stores the normalized forms of those values in `search_keys`
+# when it is inserted; a multikey index on that array turns a q= prefix into
+# an anchored regex with tight index bounds instead of a collection scan.
+#
+# The list order (created_at, id) can't come from that index once a prefix
+# spans several keys, and a short common prefix can match most of the
+# collection, so q= pages walk the index instead of sorting the matches:
+# grouped by matched key, newest first within each key (see lookup_page).
+SEARCH_KEYS_FIELD = "search_keys"
+LOOKUP_INDEX = "search_keys_created"
+MIN_QUERY_LENGTH = 3
+# Trailing digits kept as an extra key, so numbers match with or without a country code
+LOCAL_PHONE_DIGITS = 10
+
+def normalize(text: Optional[str]) -> str:
+    # Lowercase, strip accents and collapse whitespace
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", str(text))
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(stripped.lower().split())
+
+def _digits(text: Optional[str]) -> str:
+    return re.sub(r"\D", "", text or "")
+
+def _text_keys(text: Optional[str]) -> List[str]:
+    # The whole value plus each word, so "doe" finds "Jane Doe"
+    value = normalize(text)
+    if not value:
+        return []
+    words = value.split(" ")
+    return [value] + words[1:] if len(words) > 1 else [value]
+
+def _phone_keys(phone: Optional[str]) -> List[str]:
+    digits = _digits(phone)
+    if not digits:
+        return []
+    local = digits[-LOCAL_PHONE_DIGITS:]
+    return [digits, local] if local != digits else [digits]
+
+def build_search_keys(texts: Iterable[Optional[str]] = (), phones: Iterable[Optional[str]] = ()) -> List[str]:
+    keys = []
+    for text in texts:
+        keys.extend(_text_keys(text))
+    for phone in phones:
+        keys.extend(_phone_keys(phone))
+    return list(dict.fromkeys(key for key in keys if key))
+
+def application_search_keys(application: dict) -> List[str]:
+    form_data = application.get("form_data") or {}
+    return build_search_keys(
+        texts=[form_data.get("name"), form_data.get("email")],
+        phones=[form_data.get("phone")]
+    )
+
+def contact_search_keys(contact: dict) -> List[str]:
+    return build_search_keys(
+        texts=[contact.get("name"), contact.get("email"), contact.get("subject")],
+        phones=[contact.get("phone")]
+    )
+
+def prefix_filter(q: str) -> Optional[dict]:
+    """Mongo filter for a q= prefix, or None when q is too short to narrow anything."""
+    value = normalize(q)
+    digits = _digits(value)
+    # Phone lookups: "+91 98765" and "98765" both search by digits
+    if digits and re.fullmatch(r"[\d\s()+.-]+", value):
+        value = digits
+    if len(value) < MIN_QUERY_LENGTH:
+        return None
+    return {SEARCH_KEYS_FIELD: {"$regex": f"^{re.escape(value)}"}}
+
+def lookup_filter(q: str) -> dict:
+    filter_dict = prefix_filter(q)
+    if filter_dict is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"q must have at least {MIN_QUERY_LENGTH} characters"
+        )
+    return filter_dict
+
+async def lookup_page(
+    collection,
+    filter_dict: dict,
+    limit: int,
+    skip: int = 0,
+    cursor: Optional[str] = None,
+    projection: Optional[dict] = None
+) -> List[dict]:
+    """One page of q= matches in LOOKUP_INDEX order, reading only skip + limit entries."""
+    if cursor:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="cursor can't be combined with q; page lookups with skip"
+        )
+    query = collection.find(filter_dict, projection).hint(LOOKUP_INDEX)
+    return await query.skip(skip).limit(limit).to_list(limit)
+
+async def backfill_search_keys(db, batch_size: int = 1000, force: bool = False) -> dict:
+    """Write search_keys onto documents inserted before the field existed.
+
+    With force=True every document is rewritten, e.g. after the key
+    derivation above changes.
+    """
+    written = {}
+    for collection_name, derive in (("applications", application_search_keys), ("contacts", contact_search_keys)):
+        collection = db[collection_name]
+        query = {} if force else {SEARCH_KEYS_FIELD: {"$exists": False}}
+        operations = []
+        count = 0
+        async for doc in collection.find(query, {"_id": 1, "form_data": 1, "name": 1, "email": 1, "subject": 1, "phone": 1}).batch_size(batch_size):
+            operations.append(UpdateOne({"_id": doc["_id"]}, {"$set": {SEARCH_KEYS_FIELD: derive(doc)}}))
+            if len(operations) >= batch_size:
+                await collection.bulk_write(operations, ordered=False)
+                count += len(operations)
+                operations = []
+        if operations:
+            await collection.bulk_write(operations, ordered=False)
+            count += len(operations)
+        written[collection_name] = count
+    return written
@@ -0,0 +1,87 @@
+import asyncio
+import logging
+from email.message import EmailMessage
+from typing import Optional
+
+try:
+    import aiosmtplib
+except ImportError:
+    aiosmtplib = None
+
+logger = logging.getLogger(__name__)
+
+class SmtpMailer:
+    """Sends mail over one SMTP connection that is kept open between sends.
+
+    The connection is opened on first use and reopened once if the server
+    dropped it while idle. Sends are serialized on the connection; the
+    outbox worker sends a batch at a time, so one connection is enough.
+    Any SMTP server works, including a local `python -m aiosmtpd -n`.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        sender: str,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        use_tls: bool = False,
+        start_tls: bool = False,
+        timeout: float = 10.0
+    ):
+        if aiosmtplib is None:
+            raise RuntimeError("aiosmtplib is required to send mail")
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.start_tls = start_tls
+        self.timeout = timeout
+        self._client = None
+        self._lock = asyncio.Lock()
+        self.connections = 0
+
+    async def _connect(self):
+        client = aiosmtplib.SMTP(hostname=self.host, port=self.port, use_tls=self.use_tls, timeout=self.timeout)
+        await client.connect()
+        if self.start_tls and not self.use_tls:
+            await client.starttls()
+        if self.username:
+            await client.login(self.username, self.password or "")
+        self.connections += 1
+        return client
+
+    def _build(self, to: str, subject: str, body: str) -> EmailMessage:
+        message = EmailMessage()
+        message["From"] = self.sender
+        message["To"] = to
+        message["Subject"] = subject
+        message.set_content(body)
+        return message
+
+    async def send(self, to: str, subject: str, body: str) -> None:
+        message = self._build(to, subject, body)
+        async with self._lock:
+            for attempt in range(2):
+                if self._client is None or not self._client.is_connected:
+                    self._client = await self._connect()
+                try:
+                    await self._client.send_message(message)
+                    return
+                except aiosmtplib.SMTPServerDisconnected:
+                    # Idle connection closed by the server; reconnect once
+                    self._client = None
+                    if attempt:
+                        raise
+
+    async def close(self) -> None:
+        async with self._lock:
+            if self._client is not None and self._client.is_connected:
+                try:
+                    await self._client.quit()
+                except aiosmtplib.SMTPException:
+                    self._client.close()
+            self._client = None
@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Depends
+from ..server import (
+    db, principal_cache, password_pool, google_verifier, catalogue_cache,
+    outbox_worker, live_hub, admission_controller, require_role, UserRole
+)
+from ..indexes import reconcile_indexes, check_route_queries
+from ..outbox import outbox_counts
+
+router = APIRouter(prefix="/api/admin", tags=["Admin - Metrics"])
+
+@router.get("/metrics")
+async def get_runtime_metrics(
+    current_user: dict = Depends(require_role(UserRole.MANAGER))
+):
+    # Per-worker counters; each API process reports its own view
+    return {
+        "principal_cache": principal_cache.stats(),
+        "password_pool": password_pool.stats(),
+        "google_certs": google_verifier.stats(),
+        "catalogue_cache": catalogue_cache.stats(),
+        "live_updates": live_hub.stats(),
+        "admission": admission_controller.stats(),
+        "outbox": {
+            "worker": outbox_worker.stats() if outbox_worker is not None else None,
+            "messages": await outbox_counts(db)
+        }
+    }
+
+
+@router.get("/metrics/indexes")
+async def get_index_report(
+    current_user: dict = Depends(require_role(UserRole.OWNER))
+):
+    # Dry run - reports drift and collection scans without changing anything
+    return {
+        "drift": await reconcile_indexes(db, apply=False),
+        "route_queries": await check_route_queries(db)
+    }
\ No newline at end of file
@@ -0,0 +1,192 @@
+import asyncio
+import logging
+import random
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, List, Optional, Union
+from pymongo import ReturnDocument
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+# Outgoing mail is written to the `outbox` collection together with the
+# change that causes it and delivered later by OutboxWorker, so request
+# latency never includes SMTP and a crash can't lose a committed message.
+OUTBOX_PENDING = "PENDING"
+OUTBOX_SENDING = "SENDING"
+OUTBOX_SENT = "SENT"
+OUTBOX_DEAD = "DEAD"
+
+# Mongo code for "Transaction numbers are only allowed on a replica set member or mongos"
+_NO_TRANSACTIONS = 20
+_transactions_supported: Optional[bool] = None
+
+def outbox_message(kind: str, to: str, subject: str, body: str, ref: Optional[str] = None) -> dict:
+    now = datetime.utcnow()
+    return {
+        "id": str(uuid.uuid4()),
+        "kind": kind,
+        "to": to,
+        "subject": subject,
+        "body": body,
+        "ref": ref,
+        "status": OUTBOX_PENDING,
+        "attempts": 0,
+        "last_error": None,
+        "next_attempt_at": now,
+        "created_at": now,
+        "updated_at": now
+    }
+
+async def write_with_outbox(
+    client,
+    db,
+    write: Callable[[Optional[object]], Awaitable[bool]],
+    messages: Union[List[dict], Callable[[], List[dict]]]
+) -> bool:
+    """Run `write(session)` and insert `messages` in the same transaction.
+
+    `write` returns whether it changed anything; messages are only queued
+    when it did. `messages` may be a callable evaluated after the write,
+    for writes that only learn which records changed once they've run.
+    On a standalone mongod, which has no transactions, the
+    insert follows the write directly, so a crash between the two can drop
+    that message (but never queue one for a change that didn't happen).
+    """
+    global _transactions_supported
+
+    async def write_and_enqueue(session):
+        changed = await write(session)
+        queued = messages() if changed and callable(messages) else messages
+        if changed and queued:
+            await db.outbox.insert_many(queued, session=session)
+        return changed
+
+    if _transactions_supported is not False:
+        try:
+            async with await client.start_session() as session:
+                changed = await session.with_transaction(write_and_enqueue)
+            _transactions_supported = True
+            return changed
+        except OperationFailure as e:
+            if e.code != _NO_TRANSACTIONS:
+                raise
+            _transactions_supported = False
+            logger.warning("MongoDB has no transactions here; outbox inserts follow their writes directly")
+    return await write_and_enqueue(None)
+
+class OutboxWorker:
+    """Drains the outbox in batches with retry, backoff and a dead-letter state.
+
+    Messages are claimed one by one with find_one_and_update, which moves
+    them to SENDING and pushes next_attempt_at out by `lease` seconds, so
+    several workers never send the same message and a message claimed by a
+    worker that died becomes claimable again once the lease runs out.
+    """
+
+    def __init__(
+        self,
+        db,
+        mailer,
+        batch_size: int = 50,
+        max_attempts: int = 8,
+        base_backoff: float = 30.0,
+        max_backoff: float = 3600.0,
+        lease: float = 300.0
+    ):
+        self.db = db
+        self.mailer = mailer
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.lease = lease
+        self.sent = 0
+        self.retried = 0
+        self.dead = 0
+
+    def backoff(self, attempts: int) -> float:
+        delay = min(self.max_backoff, self.base_backoff * 2 ** (attempts - 1))
+        return delay * random.uniform(0.8, 1.2)
+
+    async def _claim(self) -> Optional[dict]:
+        now = datetime.utcnow()
+        return await self.db.outbox.find_one_and_update(
+            {"status": {"$in": [OUTBOX_PENDING, OUTBOX_SENDING]}, "next_attempt_at": {"$lte": now}},
+            {"$set": {
+                "status": OUTBOX_SENDING,
+                "next_attempt_at": now + timedelta(seconds=self.lease),
+                "updated_at": now
+            }},
+            sort=[("next_attempt_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def _deliver(self, message: dict) -> None:
+        try:
+            await self.mailer.send(message["to"], message["subject"], message["body"])
+        except Exception as e:
+            attempts = message["attempts"] + 1
+            now = datetime.utcnow()
+            if attempts >= self.max_attempts:
+                update = {"status": OUTBOX_DEAD, "attempts": attempts, "last_error": str(e), "updated_at": now}
+                self.dead += 1
+                logger.error("Outbox message %s dead after %d attempts: %s", message["id"], attempts, e)
+            else:
+                update = {
+                    "status": OUTBOX_PENDING,
+                    "attempts": attempts,
+                    "last_error": str(e),
+                    "next_attempt_at": now + timedelta(seconds=self.backoff(attempts)),
+                    "updated_at": now
+                }
+                self.retried += 1
+            await self.db.outbox.update_one({"id": message["id"]}, {"$set": update})
+            return
+
+        now = datetime.utcnow()
+        await self.db.outbox.update_one(
+            {"id": message["id"]},
+            {"$set": {"status": OUTBOX_SENT, "attempts": message["attempts"] + 1, "sent_at": now, "updated_at": now}}
+        )
+        self.sent += 1
+
+    async def drain_once(self) -> int:
+        """Send up to one batch of due messages. Returns how many were attempted."""
+        attempted = 0
+        while attempted < self.batch_size:
+            message = await self._claim()
+            if not message:
+                break
+            await self._deliver(message)
+            attempted += 1
+        return attempted
+
+    async def run(self, interval: float) -> None:
+        try:
+            while True:
+                try:
+                    # Keep going while full batches come back, then idle
+                    while await self.drain_once() == self.batch_size:
+                        pass
+                except Exception:
+                    logger.exception("Outbox drain failed")
+                await asyncio.sleep(interval)
+        finally:
+            await self.mailer.close()
+
+    def stats(self) -> dict:
+        return {"sent": self.sent, "retried": self.retried, "dead": self.dead}
+
+async def outbox_counts(db) -> dict:
+    rows = await db.outbox.aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}]).to_list(None)
+    return {row["_id"]: row["count"] for row in rows}
+
+async def requeue_dead(db) -> int:
+    """Give dead-lettered messages a fresh set of attempts."""
+    now = datetime.utcnow()
+    result = await db.outbox.update_many(
+        {"status": OUTBOX_DEAD},
+        {"$set": {"status": OUTBOX_PENDING, "attempts": 0, "next_attempt_at": now, "updated_at": now}}
+    )
+    return result.modified_count
@@ -0,0 +1,60 @@
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+from fastapi import HTTPException, Response, status
+
+# Admin lists are ordered newest first with id as the tie-breaker, so the
+# order is total and a cursor always points at exactly one position.
+KEYSET_SORT = [("created_at", -1), ("id", -1)]
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(doc: dict) -> str:
+    payload = {"t": doc["created_at"].isoformat(), "id": doc["id"]}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(payload["t"]), str(payload["id"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+def keyset_filter(filter_dict: dict, cursor: str) -> dict:
+    created_at, last_id = decode_cursor(cursor)
+    after_cursor = {
+        "$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "id": {"$lt": last_id}}
+        ]
+    }
+    return {"$and": [filter_dict, after_cursor]} if filter_dict else after_cursor
+
+async def paginate(
+    collection,
+    filter_dict: dict,
+    limit: int,
+    skip: int = 0,
+    cursor: Optional[str] = None,
+    projection: Optional[dict] = None
+) -> Tuple[List[dict], Optional[str]]:
+    """Fetch one page in keyset order.
+
+    With a cursor the page starts right after it and `skip` is ignored;
+    without one `skip` still works as before. The returned cursor is None
+    once the last page has been reached.
+    """
+    if cursor:
+        query = collection.find(keyset_filter(filter_dict, cursor), projection)
+    else:
+        query = collection.find(filter_dict, projection).skip(skip)
+    docs = await query.sort(KEYSET_SORT).limit(limit).to_list(limit)
+    next_cursor = encode_cursor(docs[-1]) if len(docs) == limit else None
+    return docs, next_cursor
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]) -> None:
+    # Sent as a header so the list response bodies keep their existing shape
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
@@ -1,40 +1,77 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request, Response
 from typing import List, Optional
 from datetime import datetime
 import sys
 from pathlib import Path
+from pymongo import ReturnDocument
 
 # Add the backend directory to the path
 backend_dir = Path(__file__).parent.parent
 sys.path.append(str(backend_dir))
 
 from server import (
-    db, Program, ProgramCreate, ProgramCategory, get_current_user, require_role, UserRole
+    db, Program, ProgramCreate, ProgramCategory, get_current_user, require_role, UserRole,
+    catalogue_cache, live_hub
 )
+from pagination import paginate, set_next_cursor
+from counters import bump_counters, program_activated, moved
+from rollups import record_rollup, program_created
+from registration import promote_waitlist, seat_key
+from broadcast import REGISTRATIONS_TOPIC
+from conditional import (
+    VALIDATOR_PROJECTION, compute_validators, request_is_conditional, is_not_modified,
+    not_modified, apply_validators
+)
+from fieldsets import select_fields, fieldset_projection, fieldset_model, fieldset_response
+from serialization import shape, shape_many, fast_response
 router = APIRouter(prefix="/api", tags=["Programs"])
 
 # Public endpoint - get all active programs
 @router.get("/programs", response_model=List[Program])
 async def get_programs(
+    request: Request,
     category: Optional[ProgramCategory] = None,
-    is_active: bool = True
+    is_active: bool = True,
+    fields: Optional[str] = None
 ):
     filter_dict = {"is_active": is_active} if is_active else {}
     if category:
         filter_dict["category"] = category
+    selected = select_fields("programs", Program, fields)
+    
+    async def load_programs():
+        programs = await db.programs.find(filter_dict, fieldset_projection(selected)).to_list(1000)
+        item_model = fieldset_model(Program, selected)
+        return shape_many(item_model, programs)
+    
+    async def probe_programs():
+        return await db.programs.find(filter_dict, VALIDATOR_PROJECTION).to_list(1000)
     
-    programs = await db.programs.find(filter_dict).to_list(1000)
-    return [Program(**program) for program in programs]
+    return await catalogue_cache.respond("programs", request, load_programs, probe_programs)
 
 # Public endpoint - get single program
 @router.get("/programs/{program_id}", response_model=Program)
-async def get_program(program_id: str):
-    program = await db.programs.find_one({"id": program_id, "is_active": True})
+async def get_program(program_id: str, request: Request, response: Response, fields: Optional[str] = None):
+    filter_dict = {"id": program_id, "is_active": True}
+    selected = select_fields("programs", Program, fields)
+    
+    # Revalidation only needs updated_at, not the whole document
+    if request_is_conditional(request):
+        stamp = await db.programs.find_one(filter_dict, VALIDATOR_PROJECTION)
+        if stamp:
+            etag, last_modified = compute_validators([stamp])
+            if is_not_modified(request, etag, last_modified):
+                return not_modified(etag, last_modified)
+    
+    program = await db.programs.find_one(filter_dict, fieldset_projection(selected))
     if not program:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Program not found"
         )
+    if selected is not None:
+        return fieldset_response(shape(fieldset_model(Program, selected), program), *compute_validators([program]))
+    apply_validators(response, *compute_validators([program]))
     return Program(**program)
 
 # Admin endpoints
@@ -49,13 +86,18 @@ async def create_program(
     )
     
     await db.programs.insert_one(program.dict())
+    await bump_counters(db, program_activated(program.category))
+    await record_rollup(db, program_created(program.category))
+    catalogue_cache.invalidate("programs")
     return program
 
 @router.get("/admin/programs", response_model=List[Program])
 async def get_all_programs_admin(
+    response: Response,
     current_user: dict = Depends(require_role(UserRole.EDITOR)),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
     category: Optional[ProgramCategory] = None,
     is_active: Optional[bool] = None
 ):
@@ -65,8 +107,9 @@ async def get_all_programs_admin(
     if is_active is not None:
         filter_dict["is_active"] = is_active
     
-    programs = await db.programs.find(filter_dict).skip(skip).limit(limit).to_list(limit)
-    return [Program(**program) for program in programs]
+    programs, next_cursor = await paginate(db.programs, filter_dict, limit, skip, cursor)
+    set_next_cursor(response, next_cursor)
+    return fast_response(shape_many(Program, programs), response)
 
 @router.get("/admin/programs/{program_id}", response_model=Program)
 async def get_program_admin(
@@ -87,23 +130,30 @@ async def update_program(
     program_data: ProgramCreate,
     current_user: dict = Depends(require_role(UserRole.EDITOR))
 ):
-    program = await db.programs.find_one({"id": program_id})
+    update_data = program_data.dict()
+    update_data["updated_at"] = datetime.utcnow()
+    
+    # The pre-image is the category this write actually moved the program out of
+    program = await db.programs.find_one_and_update(
+        {"id": program_id},
+        {"$set": update_data},
+        return_document=ReturnDocument.BEFORE
+    )
     if not program:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Program not found"
         )
     
-    update_data = program_data.dict()
-    update_data["updated_at"] = datetime.utcnow()
-    
-    await db.programs.update_one(
-        {"id": program_id},
-        {"$set": update_data}
-    )
+    # A raised capacity frees seats for whoever is queued
+    await promote_waitlist(db, "PROGRAM", program_id)
+    if program.get("max_participants") != program_data.max_participants:
+        live_hub.publish(REGISTRATIONS_TOPIC, {seat_key("PROGRAM", program_id): 1})
+    catalogue_cache.invalidate("programs")
+    if program.get("is_active", True):
+        await bump_counters(db, moved("programs.category", program["category"], program_data.category))
     
-    updated_program = await db.programs.find_one({"id": program_id})
-    return Program(**updated_program)
+    return Program(**{**program, **update_data})
 
 @router.delete("/admin/programs/{program_id}")
 async def delete_program(
@@ -117,10 +167,14 @@ async def delete_program(
             detail="Program not found"
         )
     
-    # Soft delete - just set is_active to False
-    await db.programs.update_one(
-        {"id": program_id},
-        {"$set": {"is_active": False, "updated_at": datetime.utcnow()}}
+    # Soft delete - just set is_active to False; only the call that deactivates it counts
+    deactivated = await db.programs.find_one_and_update(
+        {"id": program_id, "is_active": {"$ne": False}},
+        {"$set": {"is_active": False, "updated_at": datetime.utcnow()}},
+        return_document=ReturnDocument.BEFORE
     )
+    catalogue_cache.invalidate("programs")
+    if deactivated:
+        await bump_counters(db, program_activated(deactivated["category"], -1))
     
     return {"message": "Program deleted successfully"}
\ No newline at end of file
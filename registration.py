@@ -0,0 +1,324 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Callable, Optional
+from fastapi import HTTPException, status
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from counters import bump_counters, moved
+from rollups import record_rollup, status_transition
+from lookup import SEARCH_KEYS_FIELD, application_search_keys
+
+logger = logging.getLogger(__name__)
+
+# Where each application type takes its seat from:
+# (collection, application field, capacity field, counter field, extra match)
+SEAT_TARGETS = {
+    "EVENT": ("events", "event_id", "max_registrations", "current_registrations", {}),
+    "PROGRAM": ("programs", "program_id", "max_participants", "current_participants", {"is_active": True}),
+}
+
+# Application statuses that occupy a seat; REJECTED and WAITLISTED do not
+SEAT_HOLDING_STATUSES = ("PENDING", "REVIEWED", "APPROVED")
+
+# Called as listener(app_type, target_id, promoted) after promote_waitlist
+# moved applications into seats, whichever path freed them; server.py wires
+# it to the live updates hub
+_promotion_listener: Optional[Callable[[str, str, int], None]] = None
+
+def set_promotion_listener(listener: Optional[Callable[[str, str, int], None]]) -> None:
+    global _promotion_listener
+    _promotion_listener = listener
+
+def _value(value) -> str:
+    return value.value if hasattr(value, "value") else value
+
+def _target(app_type):
+    return SEAT_TARGETS[_value(app_type)]
+
+def holds_seat(application_status) -> bool:
+    return _value(application_status) in SEAT_HOLDING_STATUSES
+
+def target_id_of(application) -> str:
+    _, id_field, _, _, _ = _target(application["type"] if isinstance(application, dict) else application.type)
+    return application[id_field] if isinstance(application, dict) else getattr(application, id_field)
+
+async def _try_reserve(db, app_type, target_id: str, from_waitlist: bool = False) -> Optional[dict]:
+    collection_name, _, cap_field, count_field, extra = _target(app_type)
+    conditions = [
+        {"$or": [
+            {cap_field: None},
+            {"$expr": {"$lt": [{"$ifNull": [f"${count_field}", 0]}, f"${cap_field}"]}}
+        ]}
+    ]
+    inc = {count_field: 1}
+    if from_waitlist:
+        inc["waitlist_size"] = -1
+    else:
+        # Nobody may jump the queue while people are waiting
+        conditions.append({"$or": [{"waitlist_size": None}, {"waitlist_size": {"$lte": 0}}]})
+
+    return await db[collection_name].find_one_and_update(
+        {"id": target_id, **extra, "$and": conditions},
+        {"$inc": inc, "$set": {"updated_at": datetime.utcnow()}},
+        projection={"_id": 0, "id": 1, cap_field: 1, count_field: 1},
+        return_document=ReturnDocument.AFTER
+    )
+
+async def _find_target(db, app_type, target_id: str) -> dict:
+    collection_name, _, _, _, extra = _target(app_type)
+    target = await db[collection_name].find_one({"id": target_id, **extra}, {"_id": 0, "id": 1, "waitlist_enabled": 1})
+    if not target:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"{collection_name[:-1].capitalize()} not found"
+        )
+    return target
+
+async def reserve_seat(db, app_type, target_id: str) -> dict:
+    """Take one seat with a single conditional update.
+
+    The capacity check and the increment happen in one find_one_and_update,
+    so concurrent submissions can never push the counter past the cap. A
+    missing cap means unlimited.
+    """
+    reserved = await _try_reserve(db, app_type, target_id)
+    if reserved:
+        return reserved
+
+    # Only the failure path pays for telling "missing" from "full"
+    await _find_target(db, app_type, target_id)
+    collection_name = _target(app_type)[0]
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=f"This {collection_name[:-1]} is full"
+    )
+
+async def release_seat(db, app_type, target_id: str, count: int = 1) -> None:
+    collection_name, _, _, count_field, _ = _target(app_type)
+    await db[collection_name].update_one(
+        {"id": target_id, count_field: {"$gte": count}},
+        {"$inc": {count_field: -count}, "$set": {"updated_at": datetime.utcnow()}}
+    )
+
+def _application_document(application) -> dict:
+    document = application.dict()
+    document[SEARCH_KEYS_FIELD] = application_search_keys(document)
+    return document
+
+async def _enqueue(db, application) -> int:
+    """Insert a WAITLISTED application and give it the next sequence number."""
+    collection_name, _, _, _, extra = _target(application.type)
+    target_id = target_id_of(application)
+
+    await db.applications.insert_one(_application_document(application))
+    try:
+        target = await db[collection_name].find_one_and_update(
+            {"id": target_id, **extra},
+            {"$inc": {"waitlist_seq": 1, "waitlist_size": 1}, "$set": {"updated_at": datetime.utcnow()}},
+            projection={"_id": 0, "waitlist_seq": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        if target is None:
+            # Deleted (or deactivated) since _find_target saw it
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"{collection_name[:-1].capitalize()} not found"
+            )
+        seq = target["waitlist_seq"]
+        await db.waitlist.insert_one({
+            "application_id": application.id,
+            "user_id": application.user_id,
+            "target_type": _value(application.type),
+            "target_id": target_id,
+            "seq": seq,
+            "created_at": datetime.utcnow()
+        })
+    except Exception:
+        await db.applications.delete_one({"id": application.id})
+        raise
+    return seq
+
+async def register_application(db, application) -> None:
+    """Reserve a seat, then insert the application, undoing the seat on failure.
+
+    Duplicate applications are rejected by the unique (user_id, event_id) /
+    (user_id, program_id) indexes rather than a racy pre-check. When the
+    target is full and has its waitlist enabled, the application is stored
+    as WAITLISTED instead of being refused.
+    """
+    target_id = target_id_of(application)
+
+    if not await _try_reserve(db, application.type, target_id):
+        target = await _find_target(db, application.type, target_id)
+        if not target.get("waitlist_enabled"):
+            collection_name, id_field, _, _, _ = _target(application.type)
+            # A repeat applicant should hear about the duplicate, not the full target
+            if await db.applications.find_one({"user_id": application.user_id, id_field: target_id}, {"_id": 1}):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="You have already applied for this program/event"
+                )
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"This {collection_name[:-1]} is full"
+            )
+        application.status = "WAITLISTED"
+        try:
+            await _enqueue(db, application)
+        except DuplicateKeyError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="You have already applied for this program/event"
+            )
+        return
+
+    try:
+        await db.applications.insert_one(_application_document(application))
+    except DuplicateKeyError:
+        await release_seat(db, application.type, target_id)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="You have already applied for this program/event"
+        )
+    except Exception:
+        await release_seat(db, application.type, target_id)
+        raise
+
+async def leave_waitlist(db, application: dict) -> None:
+    collection_name = _target(application["type"])[0]
+    removed = await db.waitlist.find_one_and_delete({"application_id": application["id"]})
+    if removed:
+        await db[collection_name].update_one(
+            {"id": removed["target_id"], "waitlist_size": {"$gt": 0}},
+            # waitlist_size is public, so the catalogue validators must move with it
+            {"$inc": {"waitlist_size": -1}, "$set": {"updated_at": datetime.utcnow()}}
+        )
+
+async def promote_waitlist(db, app_type, target_id: str) -> int:
+    """Move waitlist heads into free seats, oldest first. Returns how many moved.
+
+    Each step claims the head entry with find_one_and_delete, so two
+    promoters never move the same application; if no seat turns out to be
+    free the entry goes back with its original sequence number.
+    """
+    target_type = _value(app_type)
+    promoted = 0
+    while True:
+        entry = await db.waitlist.find_one_and_delete(
+            {"target_type": target_type, "target_id": target_id},
+            sort=[("seq", 1)]
+        )
+        if not entry:
+            break
+
+        if not await _try_reserve(db, target_type, target_id, from_waitlist=True):
+            entry.pop("_id", None)
+            await db.waitlist.insert_one(entry)
+            break
+
+        result = await db.applications.update_one(
+            {"id": entry["application_id"], "status": "WAITLISTED"},
+            {"$set": {"status": "PENDING", "promoted_at": datetime.utcnow(), "updated_at": datetime.utcnow()}}
+        )
+        if result.modified_count == 0:
+            # Application vanished while queued; hand the seat to the next one
+            await release_seat(db, target_type, target_id)
+            continue
+        await bump_counters(db, moved("applications.status", "WAITLISTED", "PENDING"))
+        await record_rollup(db, status_transition("applications", "WAITLISTED", "PENDING"))
+        promoted += 1
+
+    if promoted and _promotion_listener is not None:
+        _promotion_listener(target_type, target_id, promoted)
+    return promoted
+
+async def free_seat(db, application: dict, count: int = 1) -> None:
+    """Give up the seat(s) held on the application's target and promote from the waitlist."""
+    target_id = target_id_of(application)
+    await release_seat(db, application["type"], target_id, count)
+    await promote_waitlist(db, application["type"], target_id)
+
+async def promote_all(db) -> int:
+    """Promote wherever a waitlist exists and seats are free, e.g. after a capacity increase."""
+    promoted = 0
+    for app_type, (collection_name, _, cap_field, count_field, extra) in SEAT_TARGETS.items():
+        candidates = await db[collection_name].find(
+            {**extra, "waitlist_size": {"$gt": 0}},
+            {"_id": 0, "id": 1}
+        ).to_list(None)
+        for target in candidates:
+            promoted += await promote_waitlist(db, app_type, target["id"])
+    return promoted
+
+async def run_promotion_worker(db, interval: float) -> None:
+    while True:
+        try:
+            promoted = await promote_all(db)
+            if promoted:
+                logger.info("Promoted %d waitlisted applications", promoted)
+        except Exception:
+            logger.exception("Waitlist promotion sweep failed")
+        await asyncio.sleep(interval)
+
+async def waitlist_position(db, application_id: str, user_id: str) -> Optional[dict]:
+    # Reads only the waitlist collection, never applications
+    entry = await db.waitlist.find_one({"application_id": application_id, "user_id": user_id})
+    if not entry:
+        return None
+    ahead = await db.waitlist.count_documents({
+        "target_type": entry["target_type"],
+        "target_id": entry["target_id"],
+        "seq": {"$lt": entry["seq"]}
+    })
+    return {"application_id": application_id, "position": ahead + 1, "sequence": entry["seq"]}
+
+def seat_key(app_type, target_id: str) -> str:
+    return f"{_value(app_type)}:{target_id}"
+
+async def seat_counts(db, keys) -> dict:
+    """Current capacity, seat and waitlist numbers for seat_key() keys, one query per type."""
+    by_type = {}
+    for key in keys:
+        app_type, _, target_id = key.partition(":")
+        if app_type in SEAT_TARGETS:
+            by_type.setdefault(app_type, []).append(target_id)
+
+    counts = {}
+    for app_type, target_ids in by_type.items():
+        collection_name, _, cap_field, count_field, _ = SEAT_TARGETS[app_type]
+        fields = (cap_field, count_field, "waitlist_size")
+        docs = await db[collection_name].find(
+            {"id": {"$in": target_ids}},
+            {"_id": 0, "id": 1, **{field: 1 for field in fields}}
+        ).to_list(len(target_ids))
+        counts[collection_name] = {doc["id"]: {field: doc.get(field) for field in fields} for doc in docs}
+    return counts
+
+async def recount_seats(db) -> dict:
+    """Reset seat and waitlist counters from the applications and waitlist.
+
+    Repairs drift left by a process dying between reserve and insert.
+    """
+    recounted = {}
+    for app_type, (collection_name, id_field, _, count_field, _) in SEAT_TARGETS.items():
+        held = await db.applications.aggregate([
+            {"$match": {"type": app_type, id_field: {"$type": "string"}, "status": {"$in": list(SEAT_HOLDING_STATUSES)}}},
+            {"$group": {"_id": f"${id_field}", "count": {"$sum": 1}}}
+        ]).to_list(None)
+        waiting = await db.waitlist.aggregate([
+            {"$match": {"target_type": app_type}},
+            {"$group": {"_id": "$target_id", "count": {"$sum": 1}}}
+        ]).to_list(None)
+        counts = {row["_id"]: row["count"] for row in held}
+        queue_sizes = {row["_id"]: row["count"] for row in waiting}
+
+        await db[collection_name].update_many({}, {"$set": {count_field: 0, "waitlist_size": 0}})
+        for target_id in set(counts) | set(queue_sizes):
+            await db[collection_name].update_one(
+                {"id": target_id},
+                {"$set": {count_field: counts.get(target_id, 0), "waitlist_size": queue_sizes.get(target_id, 0)}}
+            )
+        recounted[collection_name] = len(counts)
+    return recounted
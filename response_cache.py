@@ -0,0 +1,134 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Optional
+from fastapi import Request, Response
+
+from cache import TTLCache
+from conditional import (
+    list_validators, encoded_etag, matching_etag, request_is_conditional, not_modified, validator_headers
+)
+from serialization import dumps
+from compression import compress_variants, negotiate, SUPPORTED_ENCODINGS
+
+# Larger bodies are compressed off the event loop
+INLINE_COMPRESS_LIMIT = 64 * 1024
+
+class ResponseCache:
+    """Caches serialized JSON bodies of public GET endpoints.
+
+    Entries are keyed by namespace, route path and sorted query parameters.
+    Each namespace carries a generation number that is part of the key, so
+    `invalidate(namespace)` drops every variant at once without scanning;
+    orphaned entries simply age out. `max_staleness` bounds how long a worker
+    that missed an invalidation (another process did the write) can serve an
+    old body.
+
+    Bodies of at least `min_compress_size` bytes are compressed once when
+    the entry is built and the encoded variants are stored with it, so
+    serving gzip or brotli costs no CPU per request.
+    """
+
+    def __init__(self, maxsize: int = 512, max_staleness: float = 60.0, min_compress_size: int = 1024):
+        self._entries = TTLCache(maxsize=maxsize, ttl=max_staleness)
+        self._generations: Dict[str, int] = {}
+        self.min_compress_size = min_compress_size
+        self.invalidations = 0
+        self.encoded_responses: Dict[str, int] = {}
+
+    def _key(self, namespace: str, request: Request) -> tuple:
+        params = tuple(sorted(request.query_params.multi_items()))
+        return (namespace, self._generations.get(namespace, 0), request.url.path, params)
+
+    def invalidate(self, namespace: str) -> None:
+        self._generations[namespace] = self._generations.get(namespace, 0) + 1
+        self.invalidations += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    async def _build(self, key: tuple, build: Callable[[], Awaitable[object]]) -> dict:
+        content = await build()
+        etag, last_modified = list_validators(content)
+        body = dumps(content)
+        if len(body) > INLINE_COMPRESS_LIMIT:
+            encoded = await asyncio.to_thread(compress_variants, body, self.min_compress_size)
+        else:
+            encoded = compress_variants(body, self.min_compress_size)
+        entry = {
+            "body": body,
+            "encoded": encoded,
+            "etag": etag,
+            "last_modified": last_modified,
+            "cached_at": time.time()
+        }
+        self._entries.set(key, entry)
+        return entry
+
+    async def get_or_build(
+        self, namespace: str, request: Request, build: Callable[[], Awaitable[object]]
+    ) -> dict:
+        key = self._key(namespace, request)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = await self._build(key, build)
+        return entry
+
+    async def respond(
+        self,
+        namespace: str,
+        request: Request,
+        build: Callable[[], Awaitable[object]],
+        probe: Optional[Callable[[], Awaitable[list]]] = None
+    ) -> Response:
+        """Serve a cached body, answering conditional requests with 304.
+
+        The body goes out in the best encoding the client accepts among the
+        stored variants, each with its own ETag (see encoded_etag); every
+        response carries `Vary: Accept-Encoding`. A revalidation naming any
+        variant's tag gets a 304 carrying that tag.
+
+        On a cache miss, `probe` (a query projecting only id and updated_at)
+        lets a revalidating client get its 304 without the full documents
+        being loaded or serialized.
+        """
+        key = self._key(namespace, request)
+        entry = self._entries.get(key)
+        if entry is None:
+            if probe is not None and request_is_conditional(request):
+                etag, _ = list_validators(await probe())
+                matched = matching_etag(request, self._variant_tags(etag, SUPPORTED_ENCODINGS))
+                if matched:
+                    return self._vary(not_modified(matched, None))
+            entry = await self._build(key, build)
+
+        # Lists carry no Last-Modified (see list_validators), so only If-None-Match applies
+        matched = matching_etag(request, self._variant_tags(entry["etag"], entry["encoded"]))
+        if matched:
+            return self._vary(not_modified(matched, entry["last_modified"]))
+
+        encoding = negotiate(request.headers.get("accept-encoding"), entry["encoded"])
+        headers = validator_headers(encoded_etag(entry["etag"], encoding), entry["last_modified"])
+        headers["Vary"] = "Accept-Encoding"
+        body = entry["body"]
+        if encoding:
+            body = entry["encoded"][encoding]
+            headers["Content-Encoding"] = encoding
+            self.encoded_responses[encoding] = self.encoded_responses.get(encoding, 0) + 1
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    @staticmethod
+    def _variant_tags(etag: str, encodings) -> list:
+        return [etag, *(encoded_etag(etag, encoding) for encoding in encodings)]
+
+    @staticmethod
+    def _vary(response: Response) -> Response:
+        response.headers["Vary"] = "Accept-Encoding"
+        return response
+
+    def stats(self) -> dict:
+        return {
+            **self._entries.stats(),
+            "invalidations": self.invalidations,
+            "encoded_responses": dict(self.encoded_responses),
+            "generations": dict(self._generations)
+        }
@@ -0,0 +1,154 @@
+from datetime import date, datetime, timedelta
+from enum import Enum
+from typing import Dict, List, Optional
+from pymongo import ReplaceOne
+
+# Per-day bucket documents in `daily_rollups`, keyed by the ISO date so a
+# range read is a single _id range scan. Each bucket holds, per section:
+#   new       - documents created that day
+#   type      - new applications by type
+#   category  - new programs by category
+#   status    - status transitions that happened that day (PENDING/UNREAD on
+#               creation, then every later status change)
+GRANULARITIES = ("day", "week", "month")
+BACKFILL_BATCH_SIZE = 500
+
+def _key(value) -> str:
+    return value.value if isinstance(value, Enum) else str(value)
+
+def day_key(when: datetime) -> str:
+    return when.strftime("%Y-%m-%d")
+
+async def record_rollup(db, changes: dict, when: Optional[datetime] = None) -> None:
+    changes = {field: delta for field, delta in changes.items() if delta}
+    if not changes:
+        return
+    when = when or datetime.utcnow()
+    await db.daily_rollups.update_one(
+        {"_id": day_key(when)},
+        {
+            "$inc": changes,
+            "$setOnInsert": {"date": datetime(when.year, when.month, when.day)}
+        },
+        upsert=True
+    )
+
+def user_created() -> dict:
+    return {"users.new": 1}
+
+def application_created(app_type, status) -> dict:
+    return {
+        "applications.new": 1,
+        f"applications.type.{_key(app_type)}": 1,
+        f"applications.status.{_key(status)}": 1
+    }
+
+def contact_created(status) -> dict:
+    return {"contacts.new": 1, f"contacts.status.{_key(status)}": 1}
+
+def program_created(category) -> dict:
+    return {"programs.new": 1, f"programs.category.{_key(category)}": 1}
+
+def status_transition(section: str, old_status, new_status) -> dict:
+    if _key(old_status) == _key(new_status):
+        return {}
+    return {f"{section}.status.{_key(new_status)}": 1}
+
+async def _daily_groups(collection, date_field: str, group_field: Optional[str], match: dict) -> List[dict]:
+    group_id = {"day": {"$dateToString": {"format": "%Y-%m-%d", "date": f"${date_field}"}}}
+    if group_field:
+        group_id["value"] = f"${group_field}"
+    pipeline = [
+        {"$match": {**match, date_field: {**match.get(date_field, {}), "$type": "date"}}},
+        {"$group": {"_id": group_id, "count": {"$sum": 1}}}
+    ]
+    return await collection.aggregate(pipeline, allowDiskUse=True).to_list(None)
+
+async def backfill_rollups(db, start: date, end: date) -> int:
+    """Rebuild the buckets for [start, end] from the source collections.
+
+    Status transitions are not stored historically, so the backfill counts
+    each document once under its current status, on the day that status was
+    reached (reviewed_at/replied_at/promoted_at where known, updated_at
+    otherwise). Today is never rebuilt: live writers are still $inc-ing its
+    bucket, and an increment landing between the read and the replace would
+    be lost. Returns the number of buckets written.
+    """
+    end = min(end, datetime.utcnow().date() - timedelta(days=1))
+    if end < start:
+        return 0
+    since = datetime(start.year, start.month, start.day)
+    until = datetime(end.year, end.month, end.day) + timedelta(days=1)
+    window = {"$gte": since, "$lt": until}
+    buckets: Dict[str, dict] = {}
+
+    def add(day: str, path: str, count: int):
+        node = buckets.setdefault(day, {})
+        *parents, leaf = path.split(".")
+        for part in parents:
+            node = node.setdefault(part, {})
+        node[leaf] = node.get(leaf, 0) + count
+
+    for row in await _daily_groups(db.users, "created_at", None, {"created_at": window}):
+        add(row["_id"]["day"], "users.new", row["count"])
+    for row in await _daily_groups(db.applications, "created_at", "type", {"created_at": window}):
+        add(row["_id"]["day"], "applications.new", row["count"])
+        add(row["_id"]["day"], f"applications.type.{row['_id']['value']}", row["count"])
+    for row in await _daily_groups(db.contacts, "created_at", None, {"created_at": window}):
+        add(row["_id"]["day"], "contacts.new", row["count"])
+    for row in await _daily_groups(db.programs, "created_at", "category", {"created_at": window}):
+        add(row["_id"]["day"], "programs.new", row["count"])
+        add(row["_id"]["day"], f"programs.category.{row['_id']['value']}", row["count"])
+
+    status_sources = [
+        ("applications", db.applications, "created_at", {"status": "PENDING", "promoted_at": {"$exists": False}}),
+        ("applications", db.applications, "promoted_at", {"status": "PENDING"}),
+        ("applications", db.applications, "created_at", {"status": "WAITLISTED"}),
+        ("applications", db.applications, "reviewed_at", {"status": {"$nin": ["PENDING", "WAITLISTED"]}}),
+        ("contacts", db.contacts, "created_at", {"status": "UNREAD"}),
+        ("contacts", db.contacts, "replied_at", {"status": "REPLIED"}),
+        ("contacts", db.contacts, "updated_at", {"status": "read"}),
+    ]
+    for section, collection, date_field, match in status_sources:
+        for row in await _daily_groups(collection, date_field, "status", {**match, date_field: window}):
+            add(row["_id"]["day"], f"{section}.status.{row['_id']['value']}", row["count"])
+
+    # Each bucket is replaced in place, so readers never see the range empty
+    days = sorted(buckets)
+    for offset in range(0, len(days), BACKFILL_BATCH_SIZE):
+        await db.daily_rollups.bulk_write([
+            ReplaceOne({"_id": day}, {"date": datetime.strptime(day, "%Y-%m-%d"), **buckets[day]}, upsert=True)
+            for day in days[offset:offset + BACKFILL_BATCH_SIZE]
+        ], ordered=False)
+    await db.daily_rollups.delete_many({"_id": {"$gte": day_key(since), "$lt": day_key(until), "$nin": days}})
+    return len(buckets)
+
+def _period_start(day: datetime, granularity: str) -> datetime:
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+def _merge(target: dict, source: dict) -> None:
+    for key, value in source.items():
+        if isinstance(value, dict):
+            _merge(target.setdefault(key, {}), value)
+        elif isinstance(value, (int, float)):
+            target[key] = target.get(key, 0) + value
+
+async def read_timeseries(db, start: date, end: date, granularity: str = "day") -> List[dict]:
+    buckets = await db.daily_rollups.find(
+        {"_id": {"$gte": start.isoformat(), "$lte": end.isoformat()}}
+    ).sort("_id", 1).to_list(None)
+
+    periods: Dict[datetime, dict] = {}
+    for bucket in buckets:
+        period = _period_start(bucket["date"], granularity)
+        counts = {key: value for key, value in bucket.items() if key not in ("_id", "date")}
+        _merge(periods.setdefault(period, {}), counts)
+
+    return [
+        {"period": period.date().isoformat(), **counts}
+        for period, counts in sorted(periods.items())
+    ]
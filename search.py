@@ -0,0 +1,78 @@
+from fastapi import APIRouter, HTTPException, status, Query
+from typing import List, Optional
+import asyncio
+import heapq
+from ..server import db
+from ..fieldsets import FIELD_PRESETS
+from ..serialization import fast_response
+
+router = APIRouter(prefix="/api", tags=["Search"])
+
+# Per searchable collection: what the public may see, served with its card fields
+SEARCH_SOURCES = {
+    "programs": {"filter": {"is_active": True}},
+    "events": {"filter": {}},
+    "success_stories": {"filter": {"is_published": True}}
+}
+
+MAX_SEARCH_DEPTH = 200
+
+async def _search_collection(kind: str, q: str, depth: int) -> List[dict]:
+    projection = {
+        "_id": 0,
+        "id": 1,
+        **{field: 1 for field in FIELD_PRESETS[kind]["card"]},
+        "score": {"$meta": "textScore"}
+    }
+    hits = await db[kind].find(
+        {"$text": {"$search": q}, **SEARCH_SOURCES[kind]["filter"]},
+        projection
+    ).sort([("score", {"$meta": "textScore"})]).limit(depth).to_list(depth)
+    # Scores from different text indexes aren't comparable; rescale to this
+    # collection's best hit (which every page fetches, so pages stay consistent)
+    top_score = hits[0]["score"] if hits else 1.0
+    for hit in hits:
+        hit["type"] = kind
+        hit["score"] = hit["score"] / top_score
+    return hits
+
+# Public endpoint - ranked search over the catalogue
+@router.get("/search")
+async def search(
+    q: str = Query(..., min_length=2, max_length=200),
+    types: Optional[str] = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=50)
+):
+    """Full-text search across the public catalogue, best matches first.
+
+    Each collection has its own text index, weights and term statistics, so
+    raw textScore values don't share a scale. Every collection's scores are
+    divided by its own top score before merging: `score` is relative (1.0 is
+    the best hit of its type) and the strongest match of each type leads.
+    """
+    kinds = list(SEARCH_SOURCES)
+    if types:
+        kinds = [kind.strip() for kind in types.split(",") if kind.strip()]
+        if not kinds or any(kind not in SEARCH_SOURCES for kind in kinds):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"types must be a comma-separated subset of: {', '.join(SEARCH_SOURCES)}"
+            )
+    
+    # Each collection only needs to supply enough hits to fill this page
+    depth = skip + limit + 1
+    if depth > MAX_SEARCH_DEPTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Search results are limited to the top {MAX_SEARCH_DEPTH - 1}"
+        )
+    
+    per_kind = await asyncio.gather(*(_search_collection(kind, q, depth) for kind in kinds))
+    ranked = list(heapq.merge(*per_kind, key=lambda hit: hit["score"], reverse=True))
+    
+    return fast_response({
+        "query": q,
+        "hits": ranked[skip:skip + limit],
+        "has_more": len(ranked) > skip + limit
+    })
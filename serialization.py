@@ -0,0 +1,74 @@
+import json
+from functools import lru_cache
+from typing import Any, Iterable, List, Optional
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Fast path for documents read straight from Mongo. Their shape is already
+# guaranteed by the write paths, so instead of building a model per document
+# and letting FastAPI validate it again against response_model, they are
+# trimmed to the model's fields as plain dicts and serialized once.
+
+# Missing fields that are better read from another field than defaulted;
+# an old document without updated_at was last touched when it was created
+FIELD_FALLBACKS = {"updated_at": "created_at"}
+
+def _missing(doc: dict, name: str, field):
+    fallback = FIELD_FALLBACKS.get(name)
+    if fallback is not None and fallback in doc:
+        return doc[fallback]
+    return field.get_default()
+
+@lru_cache(maxsize=128)
+def _field_defaults(model) -> tuple:
+    return tuple((name, field) for name, field in model.__fields__.items())
+
+def shape(model, doc: dict) -> dict:
+    """The dict `model(**doc).dict()` would give, without validating.
+
+    Keeps only the model's fields (so `_id` and e.g. password never leak)
+    and fills defaults for fields older documents don't have yet.
+    """
+    return {
+        name: doc[name] if name in doc else _missing(doc, name, field)
+        for name, field in _field_defaults(model)
+    }
+
+def shape_many(model, docs: Iterable[dict]) -> List[dict]:
+    return [shape(model, doc) for doc in docs]
+
+def strip_ids(docs: List[dict]) -> List[dict]:
+    # For free-form dict responses that have no model to shape against
+    for doc in docs:
+        doc.pop("_id", None)
+    return docs
+
+def _default(value: Any):
+    if hasattr(value, "dict"):
+        return value.dict()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        # Handles datetime, Enum and UUID natively; naive datetimes stay naive
+        return orjson.dumps(content, default=_default)
+    return json.dumps(jsonable_encoder(content), separators=(",", ":")).encode("utf-8")
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+def fast_response(content: Any, response: Optional[Response] = None) -> FastJSONResponse:
+    """Return `content` directly, bypassing response_model validation.
+
+    Headers already set on the injected `response` (e.g. X-Next-Cursor) are
+    carried over, since FastAPI drops them when a Response is returned.
+    """
+    return FastJSONResponse(content=content, headers=dict(response.headers) if response is not None else None)
@@ -6,23 +6,44 @@ from dotenv import load_dotenv
 from datetime import datetime, timedelta
 from typing import List, Optional
 import os
+import asyncio
 import jwt
-import bcrypt
 from pydantic import BaseModel, Field, EmailStr
 import uuid
 from enum import Enum
 import logging
 from pathlib import Path
 
+from cache import TTLCache
+from hashing import BoundedExecutor, PoolSaturated, bcrypt_hash, bcrypt_check
+from google_verify import GoogleIdTokenVerifier, HttpCertSource, GOOGLE_CERTS_URL, GOOGLE_ISSUERS
+from indexes import reconcile_indexes
+from response_cache import ResponseCache
+from registration import run_promotion_worker, seat_counts, seat_key, set_promotion_listener
+from counters import bump_counters, moved, live_dashboard_state
+from broadcast import BroadcastHub, DASHBOARD_TOPIC, REGISTRATIONS_TOPIC
+from admission import AdmissionController, AdmissionControlMiddleware
+from mailer import SmtpMailer
+from outbox import OutboxWorker
+from catalogue import (
+    EventStatus, ProgramCategory, ProgramCreate, Program, EventCreate, Event,
+    SuccessStoryCreate, SuccessStory
+)
+
 # Import routes
-from routes.auth import router as auth_router
+from routes.auth import router as auth_router, ADMISSION_POLICIES as auth_admission_policies
 from routes.programs import router as programs_router
 from routes.events import router as events_router
 from routes.applications import router as applications_router
 from routes.success_stories import router as success_stories_router
-from routes.contact import router as contact_router
+from routes.contact import router as contact_router, ADMISSION_POLICIES as contact_admission_policies
 from routes.admin_users import router as admin_users_router
 from routes.dashboard import router as dashboard_router
+from routes.metrics import router as metrics_router
+from routes.exports import router as exports_router, fail_interrupted_exports
+from routes.imports import router as imports_router
+from routes.search import router as search_router
+from routes.live import router as live_router
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -31,22 +52,137 @@ load_dotenv(ROOT_DIR / '.env')
 mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ['DB_NAME']]
+ENSURE_INDEXES_ON_STARTUP = os.environ.get('ENSURE_INDEXES_ON_STARTUP', 'true').lower() == 'true'
+
+# Waitlist promotion sweep - catches seats freed by capacity increases
+WAITLIST_PROMOTION_INTERVAL_SECONDS = float(os.environ.get('WAITLIST_PROMOTION_INTERVAL_SECONDS', 30))
+background_workers = []
+
+# Outgoing mail (contact replies, application status changes) is queued in
+# the outbox and sent by a background worker; with SMTP_HOST unset nothing is
+# queued, since no worker would ever drain it.
+# For local testing: python -m aiosmtpd -n -l localhost:8025
+SMTP_HOST = os.environ.get('SMTP_HOST', '')
+MAIL_ENABLED = bool(SMTP_HOST)
+SMTP_PORT = int(os.environ.get('SMTP_PORT', 25))
+SMTP_USERNAME = os.environ.get('SMTP_USERNAME', '')
+SMTP_PASSWORD = os.environ.get('SMTP_PASSWORD', '')
+SMTP_USE_TLS = os.environ.get('SMTP_USE_TLS', 'false').lower() == 'true'
+SMTP_START_TLS = os.environ.get('SMTP_START_TLS', 'false').lower() == 'true'
+MAIL_FROM = os.environ.get('MAIL_FROM', 'no-reply@rsinnovationhub.com')
+OUTBOX_POLL_INTERVAL_SECONDS = float(os.environ.get('OUTBOX_POLL_INTERVAL_SECONDS', 5))
+OUTBOX_BATCH_SIZE = int(os.environ.get('OUTBOX_BATCH_SIZE', 50))
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get('OUTBOX_MAX_ATTEMPTS', 8))
+outbox_worker = None
+if MAIL_ENABLED:
+    outbox_worker = OutboxWorker(
+        db,
+        SmtpMailer(
+            host=SMTP_HOST,
+            port=SMTP_PORT,
+            sender=MAIL_FROM,
+            username=SMTP_USERNAME or None,
+            password=SMTP_PASSWORD or None,
+            use_tls=SMTP_USE_TLS,
+            start_tls=SMTP_START_TLS
+        ),
+        batch_size=OUTBOX_BATCH_SIZE,
+        max_attempts=OUTBOX_MAX_ATTEMPTS
+    )
+
+# Live updates over SSE - writes within the window reach subscribers as one message
+LIVE_COALESCE_WINDOW_SECONDS = float(os.environ.get('LIVE_COALESCE_WINDOW_SECONDS', 0.25))
+LIVE_QUEUE_SIZE = int(os.environ.get('LIVE_QUEUE_SIZE', 32))
+# The public registrations stream needs no login, so its connections are capped
+LIVE_MAX_PUBLIC_SUBSCRIBERS = int(os.environ.get('LIVE_MAX_PUBLIC_SUBSCRIBERS', 1000))
+LIVE_MAX_SUBSCRIBERS_PER_IP = int(os.environ.get('LIVE_MAX_SUBSCRIBERS_PER_IP', 4))
+live_hub = BroadcastHub(coalesce_window=LIVE_COALESCE_WINDOW_SECONDS, queue_size=LIVE_QUEUE_SIZE)
+live_hub.register_resolver(REGISTRATIONS_TOPIC, lambda keys: seat_counts(db, keys))
+live_hub.register_resolver(DASHBOARD_TOPIC, lambda changes: live_dashboard_state(db, changes))
+live_hub.limit_subscribers(REGISTRATIONS_TOPIC, LIVE_MAX_PUBLIC_SUBSCRIBERS, LIVE_MAX_SUBSCRIBERS_PER_IP)
+
+def publish_promotions(app_type: str, target_id: str, promoted: int) -> None:
+    # Waitlist promotions happen inside registration.py, including the background sweep
+    changes = moved("applications.status", "WAITLISTED", "PENDING")
+    live_hub.publish(DASHBOARD_TOPIC, {key: delta * promoted for key, delta in changes.items()})
+    live_hub.publish(REGISTRATIONS_TOPIC, {seat_key(app_type, target_id): 1})
+
+set_promotion_listener(publish_promotions)
+
+# Bulk export files are written here and streamed back on download
+EXPORT_DIR = Path(os.environ.get('EXPORT_DIR', ROOT_DIR / 'exports'))
+# A running export renews its lease with every batch; past it the job counts as orphaned
+EXPORT_LEASE_SECONDS = float(os.environ.get('EXPORT_LEASE_SECONDS', 300))
 
 # JWT Configuration
 JWT_SECRET = os.environ.get('JWT_SECRET', 'your-secret-key-change-in-production')
 JWT_ALGORITHM = 'HS256'
 JWT_EXPIRATION_HOURS = 24
 
+# Access/refresh token mode - short-lived access tokens are trusted on their
+# claims alone, refresh tokens go back to the database
+JWT_REFRESH_MODE = os.environ.get('JWT_REFRESH_MODE', 'false').lower() == 'true'
+ACCESS_TOKEN_EXPIRATION_MINUTES = int(os.environ.get('ACCESS_TOKEN_EXPIRATION_MINUTES', 5))
+REFRESH_TOKEN_EXPIRATION_DAYS = int(os.environ.get('REFRESH_TOKEN_EXPIRATION_DAYS', 14))
+
+# Principal cache - active user documents keyed by user id
+PRINCIPAL_CACHE_SIZE = int(os.environ.get('PRINCIPAL_CACHE_SIZE', 10000))
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.environ.get('PRINCIPAL_CACHE_TTL_SECONDS', 30))
+principal_cache = TTLCache(maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL_SECONDS)
+
+# Public catalogue cache - serialized list bodies, evicted by admin writes
+CATALOGUE_CACHE_SIZE = int(os.environ.get('CATALOGUE_CACHE_SIZE', 512))
+CATALOGUE_CACHE_MAX_STALENESS_SECONDS = float(os.environ.get('CATALOGUE_CACHE_MAX_STALENESS_SECONDS', 60))
+# Cached catalogue bodies smaller than this are served uncompressed
+CATALOGUE_COMPRESS_MIN_BYTES = int(os.environ.get('CATALOGUE_COMPRESS_MIN_BYTES', 1024))
+catalogue_cache = ResponseCache(
+    maxsize=CATALOGUE_CACHE_SIZE,
+    max_staleness=CATALOGUE_CACHE_MAX_STALENESS_SECONDS,
+    min_compress_size=CATALOGUE_COMPRESS_MIN_BYTES
+)
+
+# Password hashing pool - keeps bcrypt off the event loop
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 4))
+PASSWORD_HASH_MAX_QUEUE = int(os.environ.get('PASSWORD_HASH_MAX_QUEUE', 32))
+PASSWORD_HASH_USE_PROCESSES = os.environ.get('PASSWORD_HASH_EXECUTOR', 'thread') == 'process'
+password_pool = BoundedExecutor(
+    max_workers=PASSWORD_HASH_WORKERS,
+    max_queue=PASSWORD_HASH_MAX_QUEUE,
+    use_processes=PASSWORD_HASH_USE_PROCESSES
+)
+
+# Google sign-in - ID tokens are verified locally against cached certificates
+GOOGLE_CLIENT_ID = os.environ.get('GOOGLE_CLIENT_ID')
+GOOGLE_VERIFY_ID_TOKEN = os.environ.get('GOOGLE_VERIFY_ID_TOKEN', 'false').lower() == 'true'
+google_verifier = GoogleIdTokenVerifier(
+    source=HttpCertSource(os.environ.get('GOOGLE_CERTS_URL', GOOGLE_CERTS_URL)),
+    audience=GOOGLE_CLIENT_ID,
+    issuers=os.environ.get('GOOGLE_ISSUERS', ','.join(GOOGLE_ISSUERS)).split(',')
+)
+
 # Create the main app
-app = FastAPI(title=\"RS Innovation Hub API\")
+app = FastAPI(title="RS Innovation Hub API")
+
+# Admission control - per-route concurrency limits and rate limits, declared
+# next to each router; overload is shed early with 429/503 and Retry-After.
+# Added before CORS so that shed responses still carry CORS headers.
+ADMISSION_CONTROL_ENABLED = os.environ.get('ADMISSION_CONTROL_ENABLED', 'true').lower() == 'true'
+# Only behind a proxy that sets X-Forwarded-For itself
+TRUST_FORWARDED_FOR = os.environ.get('TRUST_FORWARDED_FOR', 'false').lower() == 'true'
+admission_controller = AdmissionController(
+    {**auth_admission_policies, **contact_admission_policies} if ADMISSION_CONTROL_ENABLED else {},
+    trust_forwarded_for=TRUST_FORWARDED_FOR
+)
+app.add_middleware(AdmissionControlMiddleware, controller=admission_controller)
 
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
-    allow_origins=[\"*\"],
-    allow_methods=[\"*\"],
-    allow_headers=[\"*\"],
+    allow_origins=["*"],
+    allow_methods=["*"],
+    allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Retry-After"],
 )
 
 # Security
@@ -61,36 +197,26 @@ logger = logging.getLogger(__name__)
 
 # Enums
 class UserRole(str, Enum):
-    USER = \"USER\"
-    EDITOR = \"EDITOR\" 
-    MANAGER = \"MANAGER\"
-    OWNER = \"OWNER\"
+    USER = "USER"
+    EDITOR = "EDITOR" 
+    MANAGER = "MANAGER"
+    OWNER = "OWNER"
 
 class ApplicationStatus(str, Enum):
-    PENDING = \"PENDING\"
-    REVIEWED = \"REVIEWED\"
-    APPROVED = \"APPROVED\"
-    REJECTED = \"REJECTED\"
+    PENDING = "PENDING"
+    REVIEWED = "REVIEWED"
+    APPROVED = "APPROVED"
+    REJECTED = "REJECTED"
+    WAITLISTED = "WAITLISTED"
 
 class ApplicationType(str, Enum):
-    PROGRAM = \"PROGRAM\"
-    EVENT = \"EVENT\"
+    PROGRAM = "PROGRAM"
+    EVENT = "EVENT"
 
 class ContactStatus(str, Enum):
-    UNREAD = \"UNREAD\"
-    read = \"read\"
-    REPLIED = \"REPLIED\"
-
-class EventStatus(str, Enum):
-    UPCOMING = \"upcoming\"
-    ONGOING = \"ongoing\"
-    COMPLETED = \"completed\"
-
-class ProgramCategory(str, Enum):
-    INCUBATION = \"incubation\"
-    COURSES = \"courses\"
-    INTERNSHIP = \"internship\"
-    EMPLOYMENT = \"employment\"
+    UNREAD = "UNREAD"
+    read = "read"
+    REPLIED = "REPLIED"
 
 # Pydantic Models
 class UserCreate(BaseModel):
@@ -108,6 +234,7 @@ class GoogleAuthData(BaseModel):
     name: str
     email: EmailStr
     picture: Optional[str] = None
+    credential: Optional[str] = None  # Google ID token, required when verification is on
 
 class User(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -131,57 +258,6 @@ class UserResponse(BaseModel):
     is_active: bool
     created_at: datetime
 
-class ProgramCreate(BaseModel):
-    title: str = Field(..., min_length=3, max_length=200)
-    description: str = Field(..., min_length=10)
-    features: List[str]
-    duration: str
-    category: ProgramCategory
-    image: Optional[str] = None
-    max_participants: Optional[int] = None
-
-class Program(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    title: str
-    description: str
-    features: List[str]
-    duration: str
-    category: ProgramCategory
-    image: Optional[str]
-    is_active: bool = True
-    max_participants: Optional[int]
-    current_participants: int = 0
-    created_by: str
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
-
-class EventCreate(BaseModel):
-    title: str = Field(..., min_length=3, max_length=200)
-    description: str = Field(..., min_length=10)
-    date: str
-    type: str
-    participants: str
-    prizes: str
-    status: EventStatus = EventStatus.UPCOMING
-    image: Optional[str] = None
-    max_registrations: Optional[int] = None
-
-class Event(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    title: str
-    description: str
-    date: str
-    type: str
-    participants: str
-    prizes: str
-    status: EventStatus
-    image: Optional[str]
-    max_registrations: Optional[int]
-    current_registrations: int = 0
-    created_by: str
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
-
 class ApplicationData(BaseModel):
     name: str
     email: EmailStr
@@ -210,25 +286,6 @@ class Application(BaseModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
-class SuccessStoryCreate(BaseModel):
-    name: str = Field(..., min_length=2, max_length=100)
-    company: str = Field(..., min_length=2, max_length=200)
-    story: str = Field(..., min_length=10)
-    achievement: str = Field(..., min_length=3, max_length=200)
-    image: Optional[str] = None
-
-class SuccessStory(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    name: str
-    company: str
-    story: str
-    achievement: str
-    image: Optional[str]
-    is_published: bool = True
-    created_by: str
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
-
 class ContactCreate(BaseModel):
     name: str = Field(..., min_length=2, max_length=100)
     email: EmailStr
@@ -250,14 +307,81 @@ class Contact(BaseModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
+class BulkApplicationStatusUpdate(BaseModel):
+    ids: Optional[List[str]] = None
+    filters: Optional[dict] = None  # status_filter / type_filter, as on the list endpoint
+    status: ApplicationStatus
+    review_notes: Optional[str] = ""
+
+class BulkContactStatusUpdate(BaseModel):
+    ids: Optional[List[str]] = None
+    filters: Optional[dict] = None  # status_filter, as on the list endpoint
+    status: ContactStatus
+
+class BulkUserStatusUpdate(BaseModel):
+    ids: Optional[List[str]] = None
+    filters: Optional[dict] = None  # role_filter / is_active, as on the list endpoint
+    is_active: bool
+
+class ExportFormat(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+class ImportFormat(str, Enum):
+    CSV = "csv"
+    JSON = "json"
+    NDJSON = "ndjson"
+
+class ExportStatus(str, Enum):
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+
+class ExportCreate(BaseModel):
+    collection: str
+    format: ExportFormat = ExportFormat.CSV
+    # Same filters the matching admin list endpoint accepts
+    status_filter: Optional[str] = None
+    type_filter: Optional[ApplicationType] = None
+    role_filter: Optional[UserRole] = None
+    is_active: Optional[bool] = None
+
+class ExportJob(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    collection: str
+    format: ExportFormat
+    filters: dict = {}
+    status: ExportStatus = ExportStatus.PENDING
+    total: int = 0
+    processed: int = 0
+    file_size: int = 0
+    error: Optional[str] = None
+    requested_by: str
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    completed_at: Optional[datetime] = None
+
 # Utility Functions
-def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+async def _run_password_job(fn, *args):
+    try:
+        return await password_pool.run(fn, *args)
+    except PoolSaturated:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication service busy, please retry shortly",
+            headers={"Retry-After": "1"}
+        )
 
-def verify_password(password: str, hashed: str) -> bool:
-    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+async def hash_password(password: str) -> str:
+    return await _run_password_job(bcrypt_hash, password)
+
+async def verify_password(password: str, hashed: str) -> bool:
+    return await _run_password_job(bcrypt_check, password, hashed)
 
 def create_jwt_token(user_data: dict) -> str:
+    if JWT_REFRESH_MODE:
+        return create_access_token(user_data)
     payload = {
         **user_data,
         'exp': datetime.utcnow() + timedelta(hours=JWT_EXPIRATION_HOURS),
@@ -265,39 +389,103 @@ def create_jwt_token(user_data: dict) -> str:
     }
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
+def create_access_token(user_data: dict) -> str:
+    payload = {
+        **user_data,
+        'type': 'access',
+        'exp': datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRATION_MINUTES),
+        'iat': datetime.utcnow()
+    }
+    return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
+
+def create_refresh_token(user_id: str) -> str:
+    payload = {
+        'id': user_id,
+        'type': 'refresh',
+        'jti': str(uuid.uuid4()),
+        'exp': datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRATION_DAYS),
+        'iat': datetime.utcnow()
+    }
+    return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
+
+def create_token_pair(user_data: dict) -> dict:
+    tokens = {"token": create_jwt_token(user_data)}
+    if JWT_REFRESH_MODE:
+        tokens["refresh_token"] = create_refresh_token(user_data["id"])
+    return tokens
+
 def verify_jwt_token(token: str) -> dict:
     try:
         payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
         return payload
     except jwt.ExpiredSignatureError:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=\"Token expired\")
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token expired")
     except jwt.JWTError:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=\"Invalid token\")
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+
+async def load_user(user_id: str) -> dict:
+    user = principal_cache.get(user_id)
+    if user is None:
+        user = await db.users.find_one({"id": user_id})
+        if not user or not user.get("is_active", True):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found or inactive")
+        principal_cache.set(user_id, user)
+    
+    # Hand out a copy so handlers can't mutate the cached document
+    return dict(user)
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
     token = credentials.credentials
     payload = verify_jwt_token(token)
     
-    user = await db.users.find_one({\"id\": payload[\"id\"]})
-    if not user or not user.get(\"is_active\", True):
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=\"User not found or inactive\")
+    token_type = payload.get("type")
+    if token_type == "refresh":
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token type")
+    
+    # Access tokens are short-lived, so their claims are trusted without a lookup
+    if token_type == "access":
+        return {
+            "id": payload["id"],
+            "email": payload["email"],
+            "name": payload["name"],
+            "role": payload["role"],
+            "is_active": True
+        }
     
-    return user
+    return await load_user(payload["id"])
+
+async def get_current_user_document(current_user: dict = Depends(get_current_user)) -> dict:
+    # Full user document for handlers that need more than the token claims
+    if "created_at" in current_user:
+        return current_user
+    return await load_user(current_user["id"])
+
+async def record_counter_change(changes: dict) -> None:
+    """Move the dashboard counters and push the same delta to live dashboard subscribers."""
+    await bump_counters(db, changes)
+    live_hub.publish(DASHBOARD_TOPIC, changes)
+
+def invalidate_cached_user(user_id: str) -> None:
+    """Evict a principal after any write that changes its role, status or profile."""
+    principal_cache.delete(user_id)
+
+ROLE_HIERARCHY = {
+    UserRole.USER: 0,
+    UserRole.EDITOR: 1, 
+    UserRole.MANAGER: 2,
+    UserRole.OWNER: 3
+}
+
+def has_role(current_user: dict, min_role: UserRole) -> bool:
+    user_role = UserRole(current_user.get("role", UserRole.USER))
+    return ROLE_HIERARCHY[user_role] >= ROLE_HIERARCHY[min_role]
 
 def require_role(min_role: UserRole):
-    role_hierarchy = {
-        UserRole.USER: 0,
-        UserRole.EDITOR: 1, 
-        UserRole.MANAGER: 2,
-        UserRole.OWNER: 3
-    }
-    
     async def role_checker(current_user: dict = Depends(get_current_user)):
-        user_role = UserRole(current_user.get(\"role\", UserRole.USER))
-        if role_hierarchy[user_role] < role_hierarchy[min_role]:
+        if not has_role(current_user, min_role):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
-                detail=f\"Insufficient permissions. Required: {min_role.value}\"
+                detail=f"Insufficient permissions. Required: {min_role.value}"
             )
         return current_user
     
@@ -312,12 +500,37 @@ app.include_router(success_stories_router)
 app.include_router(contact_router)
 app.include_router(admin_users_router)
 app.include_router(dashboard_router)
+app.include_router(metrics_router)
+app.include_router(exports_router)
+app.include_router(imports_router)
+app.include_router(search_router)
+app.include_router(live_router)
 
 # Root endpoint
-@app.get(\"/api/\")
+@app.get("/api/")
 async def root():
-    return {\"message\": \"RS Innovation Hub API\", \"version\": \"1.0.0\"}
-
-@app.on_event(\"shutdown\")
+    return {"message": "RS Innovation Hub API", "version": "1.0.0"}
+
+@app.on_event("startup")
+async def start_background_tasks():
+    if ENSURE_INDEXES_ON_STARTUP:
+        try:
+            await reconcile_indexes(db)
+        except Exception:
+            logger.exception("Index reconciliation failed")
+    await fail_interrupted_exports()
+    if GOOGLE_VERIFY_ID_TOKEN:
+        google_verifier.start()
+    background_workers.append(
+        asyncio.create_task(run_promotion_worker(db, WAITLIST_PROMOTION_INTERVAL_SECONDS))
+    )
+    if outbox_worker is not None:
+        background_workers.append(asyncio.create_task(outbox_worker.run(OUTBOX_POLL_INTERVAL_SECONDS)))
+
+@app.on_event("shutdown")
 async def shutdown_db_client():
+    for worker in background_workers:
+        worker.cancel()
+    await google_verifier.stop()
+    password_pool.shutdown()
     client.close()
\ No newline at end of file
@@ -1,27 +1,59 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request, Response
 from typing import List, Optional
 from datetime import datetime
 from ..server import (
-    db, SuccessStory, SuccessStoryCreate, get_current_user, require_role, UserRole
+    db, SuccessStory, SuccessStoryCreate, get_current_user, require_role, UserRole,
+    catalogue_cache
 )
+from ..pagination import paginate, set_next_cursor
+from ..counters import bump_counters
+from ..conditional import (
+    VALIDATOR_PROJECTION, compute_validators, request_is_conditional, is_not_modified,
+    not_modified, apply_validators
+)
+from ..fieldsets import select_fields, fieldset_projection, fieldset_model, fieldset_response
+from ..serialization import shape, shape_many, fast_response
 
 router = APIRouter(prefix="/api", tags=["Success Stories"])
 
 # Public endpoint - get published success stories
 @router.get("/success-stories", response_model=List[SuccessStory])
-async def get_success_stories():
-    stories = await db.success_stories.find({"is_published": True}).to_list(1000)
-    return [SuccessStory(**story) for story in stories]
+async def get_success_stories(request: Request, fields: Optional[str] = None):
+    selected = select_fields("success_stories", SuccessStory, fields)
+    
+    async def load_stories():
+        stories = await db.success_stories.find({"is_published": True}, fieldset_projection(selected)).to_list(1000)
+        item_model = fieldset_model(SuccessStory, selected)
+        return shape_many(item_model, stories)
+    
+    async def probe_stories():
+        return await db.success_stories.find({"is_published": True}, VALIDATOR_PROJECTION).to_list(1000)
+    
+    return await catalogue_cache.respond("success_stories", request, load_stories, probe_stories)
 
 # Public endpoint - get single success story
 @router.get("/success-stories/{story_id}", response_model=SuccessStory)
-async def get_success_story(story_id: str):
-    story = await db.success_stories.find_one({"id": story_id, "is_published": True})
+async def get_success_story(story_id: str, request: Request, response: Response, fields: Optional[str] = None):
+    filter_dict = {"id": story_id, "is_published": True}
+    selected = select_fields("success_stories", SuccessStory, fields)
+    
+    # Revalidation only needs updated_at, not the whole document
+    if request_is_conditional(request):
+        stamp = await db.success_stories.find_one(filter_dict, VALIDATOR_PROJECTION)
+        if stamp:
+            etag, last_modified = compute_validators([stamp])
+            if is_not_modified(request, etag, last_modified):
+                return not_modified(etag, last_modified)
+    
+    story = await db.success_stories.find_one(filter_dict, fieldset_projection(selected))
     if not story:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Success story not found"
         )
+    if selected is not None:
+        return fieldset_response(shape(fieldset_model(SuccessStory, selected), story), *compute_validators([story]))
+    apply_validators(response, *compute_validators([story]))
     return SuccessStory(**story)
 
 # Admin endpoints
@@ -36,21 +68,26 @@ async def create_success_story(
     )
     
     await db.success_stories.insert_one(story.dict())
+    await bump_counters(db, {"success_stories.published": 1 if story.is_published else 0})
+    catalogue_cache.invalidate("success_stories")
     return story
 
 @router.get("/admin/success-stories", response_model=List[SuccessStory])
 async def get_all_success_stories_admin(
+    response: Response,
     current_user: dict = Depends(require_role(UserRole.EDITOR)),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
     is_published: Optional[bool] = None
 ):
     filter_dict = {}
     if is_published is not None:
         filter_dict["is_published"] = is_published
     
-    stories = await db.success_stories.find(filter_dict).skip(skip).limit(limit).to_list(limit)
-    return [SuccessStory(**story) for story in stories]
+    stories, next_cursor = await paginate(db.success_stories, filter_dict, limit, skip, cursor)
+    set_next_cursor(response, next_cursor)
+    return fast_response(shape_many(SuccessStory, stories), response)
 
 @router.get("/admin/success-stories/{story_id}", response_model=SuccessStory)
 async def get_success_story_admin(
@@ -85,6 +122,7 @@ async def update_success_story(
         {"id": story_id},
         {"$set": update_data}
     )
+    catalogue_cache.invalidate("success_stories")
     
     updated_story = await db.success_stories.find_one({"id": story_id})
     return SuccessStory(**updated_story)
@@ -102,12 +140,16 @@ async def toggle_story_publication(
             detail="Success story not found"
         )
     
-    is_published = publish_data.get("is_published", not story["is_published"])
+    is_published = bool(publish_data.get("is_published", not story["is_published"]))
     
-    await db.success_stories.update_one(
-        {"id": story_id},
+    # Only match a story still in the opposite state, so concurrent toggles count once
+    result = await db.success_stories.update_one(
+        {"id": story_id, "is_published": {"$ne": is_published}},
         {"$set": {"is_published": is_published, "updated_at": datetime.utcnow()}}
     )
+    catalogue_cache.invalidate("success_stories")
+    if result.modified_count:
+        await bump_counters(db, {"success_stories.published": 1 if is_published else -1})
     
     action = "published" if is_published else "unpublished"
     return {"message": f"Success story {action} successfully"}
@@ -117,12 +159,15 @@ async def delete_success_story(
     story_id: str,
     current_user: dict = Depends(require_role(UserRole.MANAGER))
 ):
-    story = await db.success_stories.find_one({"id": story_id})
+    # Only the call that actually removes the story counts it
+    story = await db.success_stories.find_one_and_delete({"id": story_id})
     if not story:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Success story not found"
         )
     
-    await db.success_stories.delete_one({"id": story_id})
+    if story.get("is_published"):
+        await bump_counters(db, {"success_stories.published": -1})
+    catalogue_cache.invalidate("success_stories")
     return {"message": "Success story deleted successfully"}
\ No newline at end of file